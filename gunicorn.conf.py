@@ -0,0 +1,46 @@
+import decouple
+
+# Sync workers by default. The item change stream (ITEM_CHANGES_STREAM) keeps
+# a request open per consumer and needs an async class such as "gevent".
+worker_class = decouple.config("GUNICORN_WORKER_CLASS", default="sync")
+green_workers = worker_class in ("gevent", "eventlet")
+
+# Import the application once in the master and fork the workers from it,
+# so they share its memory pages instead of each importing Django again.
+# Off by default for green workers: they monkey patch the standard library
+# when they start, which must happen before the application imports ssl,
+# threading or the warming executor.
+preload_app = decouple.config("GUNICORN_PRELOAD", default=not green_workers, cast=bool)
+
+
+def pre_fork(server, worker):
+    """
+    Close connections opened by the master while loading the application.
+
+    Workers must not share the master's sockets, each worker opens its own
+    database and Redis connections on first use.
+    """
+    if not server.cfg.preload_app:
+        return
+
+    from django.db import connections
+    from django_redis import get_redis_connection
+
+    connections.close_all()
+    get_redis_connection("default").connection_pool.disconnect()
+
+
+def post_worker_init(worker):
+    """
+    Make psycopg2 yield to other greenlets while it waits on the database.
+    """
+    if worker_class != "gevent":
+        return
+    try:
+        from psycogreen.gevent import patch_psycopg
+    except ImportError:
+        worker.log.warning(
+            "psycogreen is not installed, database queries block the gevent worker."
+        )
+        return
+    patch_psycopg()
@@ -0,0 +1,97 @@
+"""
+Database router sending selected reads to read replicas.
+
+Reads only go to a replica inside `use_replicas()`, which ItemViewSet
+enters for its read actions. Everything else, including all writes,
+stays on the primary (`default`) database. After a client writes, it is
+pinned to the primary for REPLICA_PIN_SECONDS so it reads its own writes
+despite replication lag.
+"""
+
+import contextlib
+import contextvars
+import random
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+read_from_replicas = contextvars.ContextVar("read_from_replicas", default=False)
+
+PIN_CACHE_PREFIX = "primary_pin_"
+# Pinned after any write, for data shared by all clients such as cached lists
+GLOBAL_PIN_KEY = f"{PIN_CACHE_PREFIX}all"
+
+
+@contextlib.contextmanager
+def use_replicas(enabled=True):
+    """
+    Send reads inside the block to a replica, or to the primary if disabled.
+    """
+    token = read_from_replicas.set(enabled)
+    try:
+        yield
+    finally:
+        read_from_replicas.reset(token)
+
+
+def get_pin_key(user):
+    return f"{PIN_CACHE_PREFIX}{user.pk}"
+
+
+def pin_to_primary(user):
+    """
+    Pin the user, and shared data, to the primary after a write.
+
+    Args:
+        user (User): The user who wrote, may be anonymous.
+    """
+    if not settings.DATABASE_REPLICAS:
+        return
+    keys = {GLOBAL_PIN_KEY: 1}
+    if user.is_authenticated:
+        keys[get_pin_key(user)] = 1
+    cache.set_many(keys, timeout=settings.REPLICA_PIN_SECONDS)
+
+
+def is_pinned(user=None):
+    """
+    Check whether reads must go to the primary.
+
+    Args:
+        user (User): The user to check, or None to check for a recent write
+            by anyone.
+
+    Returns:
+        bool: True if the reads must go to the primary.
+    """
+    if not settings.DATABASE_REPLICAS:
+        return False
+    if user is None:
+        return cache.get(GLOBAL_PIN_KEY) is not None
+    if not user.is_authenticated:
+        return False
+    return cache.get(get_pin_key(user)) is not None
+
+
+class ReplicaRouter:
+    """
+    Route reads inside use_replicas() to a random replica from
+    settings.DATABASE_REPLICAS, and everything else to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        if read_from_replicas.get() and settings.DATABASE_REPLICAS:
+            return random.choice(settings.DATABASE_REPLICAS)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Instances read from a replica are still saved to the primary.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
@@ -0,0 +1,94 @@
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+
+def compress_zstd(content):
+    return zstandard.ZstdCompressor(level=3).compress(content)
+
+
+def compress_brotli(content):
+    return brotli.compress(content, quality=4)
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Compress responses with the best encoding accepted by the client.
+
+    zstd and brotli are offered when the `zstandard` and `brotli` packages
+    are installed, gzip is left to GZipMiddleware. Streaming responses are
+    not compressed: GZipMiddleware does not flush between chunks, so a
+    Server-Sent Events stream would be held back until it ends.
+    """
+
+    compressors = {}
+    if zstandard is not None:
+        compressors["zstd"] = compress_zstd
+    if brotli is not None:
+        compressors["br"] = compress_brotli
+
+    def get_encoding(self, request):
+        """
+        Get the preferred encoding accepted by the client.
+
+        Returns:
+            str: One of the available encodings, or None to fall back to gzip.
+        """
+        accepted = {}
+        header = request.META.get("HTTP_ACCEPT_ENCODING", "")
+        for part in header.split(","):
+            name, _, params = part.strip().partition(";")
+            quality = 1.0
+            params = params.strip()
+            if params.startswith("q="):
+                try:
+                    quality = float(params[2:])
+                except ValueError:
+                    quality = 0.0
+            accepted[name.strip().lower()] = quality
+
+        candidates = [
+            (accepted[name], name)
+            for name in self.compressors
+            if accepted.get(name, 0) > 0
+        ]
+        if not candidates or max(candidates)[0] < accepted.get("gzip", 0):
+            return None
+        # Prefer the order of self.compressors when qualities are equal.
+        return max(candidates, key=lambda candidate: candidate[0])[1]
+
+    def process_response(self, request, response):
+        if response.streaming:
+            return response
+        if (
+            len(response.content) < 200
+            or response.has_header("Content-Encoding")
+        ):
+            return super().process_response(request, response)
+
+        encoding = self.get_encoding(request)
+        if encoding is None:
+            return super().process_response(request, response)
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        compressed_content = self.compressors[encoding](response.content)
+        if len(compressed_content) >= len(response.content):
+            return response
+        response.content = compressed_content
+        response.headers["Content-Length"] = str(len(response.content))
+
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = encoding
+
+        return response
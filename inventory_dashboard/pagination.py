@@ -0,0 +1,171 @@
+"""
+Pagination of API list responses.
+
+Counts are cached per filter, estimated from the planner statistics for
+large unfiltered tables, and skipped entirely with `?count=false`.
+"""
+
+import functools
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.core.paginator import EmptyPage, Paginator
+from django.db import connections
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+
+from items_management import list_cache
+
+
+class CountedPaginator(Paginator):
+    """
+    Paginator using a count computed ahead of time instead of `COUNT(*)`.
+    """
+
+    def __init__(self, *args, count=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if count is not None:
+            self.count = count
+
+
+class UncountedPaginator(Paginator):
+    """
+    Paginator that never counts the results.
+
+    One extra row is fetched to tell whether there is a next page.
+    """
+
+    def validate_number(self, number):
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise EmptyPage("That page number is not an integer")
+        if number < 1:
+            raise EmptyPage("That page number is less than 1")
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        object_list = list(self.object_list[bottom : bottom + self.per_page + 1])
+        if not object_list and number > 1:
+            raise EmptyPage("That page contains no results")
+        self.num_pages = number + (len(object_list) > self.per_page)
+        return self._get_page(object_list[: self.per_page], number, self)
+
+
+class StandardResultsSetPagination(PageNumberPagination):
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+    # Clients can skip the count with e.g. ?count=false
+    count_query_param = "count"
+    # Counts are cached per filter and cleared along with the item list cache
+    count_cache_prefix = "item_list_count_"
+    count_cache_timeout = 60 * 15
+    # Unfiltered tables larger than this use the planner estimate (Postgres only)
+    estimate_count_threshold = 100000
+    # Parameters that do not change the number of results
+    non_filter_query_params = (
+        "page",
+        "page_size",
+        "ordering",
+        "count",
+        "format",
+        "fields",
+        "exclude",
+    )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.include_count = self.get_include_count(request)
+        self.count_estimated = False
+        self.count = None
+        if self.include_count:
+            self.count = self.get_count(queryset, request)
+        if self.include_count and not self.count_estimated:
+            self.django_paginator_class = functools.partial(
+                CountedPaginator, count=self.count
+            )
+        else:
+            # An estimate is only reported, pages are bounded by the rows found
+            self.django_paginator_class = UncountedPaginator
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_page_number(self, request, paginator):
+        page_number = request.query_params.get(self.page_query_param, 1)
+        if page_number in self.last_page_strings and (
+            not self.include_count or self.count_estimated
+        ):
+            raise NotFound("The last page is only available with exact counts.")
+        return super().get_page_number(request, paginator)
+
+    def get_include_count(self, request):
+        value = request.query_params.get(self.count_query_param, "")
+        return value.lower() not in ("0", "false", "no", "off")
+
+    def get_count_cache_key(self, request):
+        params = sorted(
+            (key, values)
+            for key, values in request.query_params.lists()
+            if key not in self.non_filter_query_params
+        )
+        query = urlencode(params, doseq=True)
+        path = f"{request.path}?{query}" if query else request.path
+        return f"{self.count_cache_prefix}{path}"
+
+    def get_count(self, queryset, request):
+        cache_key = self.get_count_cache_key(request)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            count, self.count_estimated = cached
+            return count
+
+        # A count taken across a list cache clear may predate the write that
+        # cleared it, so it is not kept (see list_cache.compute_and_store).
+        generation = list_cache.get_generation()
+        count = None
+        if not queryset.query.where:
+            count = self.get_estimated_count(queryset)
+        self.count_estimated = count is not None
+        if count is None:
+            count = queryset.count()
+        if list_cache.get_generation() != generation:
+            return count
+        cache.set(
+            cache_key, (count, self.count_estimated), timeout=self.count_cache_timeout
+        )
+        if list_cache.get_generation() != generation:
+            cache.delete(cache_key)
+        return count
+
+    def get_estimated_count(self, queryset):
+        """
+        Get the planner estimate of the table size, if it is large enough.
+        """
+        connection = connections[queryset.db]
+        if connection.vendor != "postgresql":
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples FROM pg_class WHERE oid = %s::regclass",
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        if row is None or row[0] < self.estimate_count_threshold:
+            return None
+        return int(row[0])
+
+    def get_paginated_response(self, data):
+        if self.include_count and not self.count_estimated:
+            return super().get_paginated_response(data)
+        # The base response reads paginator.count, which would run COUNT(*)
+        response_data = {}
+        if self.include_count:
+            response_data["count"] = self.count
+            response_data["count_estimated"] = True
+        response_data["next"] = self.get_next_link()
+        response_data["previous"] = self.get_previous_link()
+        response_data["results"] = data
+        return Response(response_data)
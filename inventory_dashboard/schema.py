@@ -0,0 +1,191 @@
+"""
+OpenAPI schema views.
+
+The schema document is generated once per process, or read from the
+artifact written by `manage.py generate_openapi_schema` at deploy time,
+and served with an ETag so that clients can revalidate it cheaply.
+Artifacts record the version of the code they were generated from and
+are ignored once the code changes.
+"""
+
+import functools
+import hashlib
+from importlib.metadata import version
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_safe
+
+SCHEMA_CONTENT_TYPES = {
+    ".json": "application/json",
+    ".yaml": "application/yaml",
+}
+
+
+def get_api_info():
+    from drf_yasg import openapi
+
+    return openapi.Info(
+        title="Item API",
+        default_version="v1",
+        description="API documentation for Item API",
+    )
+
+
+@functools.cache
+def get_schema_view_class():
+    """
+    Build the drf_yasg schema view class.
+
+    drf_yasg's generators and inspectors are only imported on the first
+    documentation request, keeping them out of every worker's startup.
+    """
+    from drf_yasg.views import get_schema_view
+    from rest_framework import permissions
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+
+    return get_schema_view(
+        get_api_info(),
+        public=True,
+        permission_classes=(permissions.AllowAny,),
+        authentication_classes=(JWTAuthentication,),
+    )
+
+
+def lazy_schema_view(renderer, cache_timeout=0):
+    """
+    Get a view that builds the schema UI view for `renderer` when it is
+    first requested.
+    """
+
+    @functools.cache
+    def get_view():
+        return get_schema_view_class().with_ui(renderer, cache_timeout=cache_timeout)
+
+    @csrf_exempt
+    def view(request, *args, **kwargs):
+        return get_view()(request, *args, **kwargs)
+
+    return view
+
+
+# Packages whose version changes the generated schema
+SCHEMA_PACKAGES = ("drf-yasg", "djangorestframework", "django-filter")
+
+
+def get_schema_path(format):
+    return Path(settings.OPENAPI_SCHEMA_DIR) / f"openapi{format}"
+
+
+def get_version_path(format):
+    return get_schema_path(format).with_suffix(f"{format}.version")
+
+
+@functools.cache
+def get_code_version():
+    """
+    Hash the project sources and the packages the schema is generated from.
+
+    Returns:
+        str: The hex digest.
+    """
+    base_dir = Path(settings.BASE_DIR)
+    source_dirs = {base_dir / settings.ROOT_URLCONF.partition(".")[0]}
+    source_dirs.update(
+        Path(app_config.path)
+        for app_config in apps.get_app_configs()
+        if Path(app_config.path).is_relative_to(base_dir)
+    )
+    digest = hashlib.sha256()
+    for package in SCHEMA_PACKAGES:
+        digest.update(f"{package}=={version(package)}\n".encode())
+    for source_dir in sorted(source_dirs):
+        for path in sorted(source_dir.rglob("*.py")):
+            digest.update(str(path.relative_to(base_dir)).encode())
+            digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def write_schema_document(format):
+    """
+    Generate the schema document and write it with the code version.
+
+    Returns:
+        Path: The path of the document.
+    """
+    path = get_schema_path(format)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(generate_schema_document(format))
+    get_version_path(format).write_text(get_code_version())
+    return path
+
+
+def read_schema_document(format):
+    """
+    Read the schema artifact, if it was generated from the current code.
+
+    Returns:
+        bytes: The encoded document, or None.
+    """
+    try:
+        artifact_version = get_version_path(format).read_text()
+        content = get_schema_path(format).read_bytes()
+    except FileNotFoundError:
+        return None
+    if artifact_version != get_code_version():
+        return None
+    return content
+
+
+def generate_schema_document(format):
+    """
+    Generate the public schema document.
+
+    Args:
+        format (str): The document format, ".json" or ".yaml".
+
+    Returns:
+        bytes: The encoded document.
+    """
+    from drf_yasg.codecs import OpenAPICodecJson, OpenAPICodecYaml
+
+    codecs = {".json": OpenAPICodecJson, ".yaml": OpenAPICodecYaml}
+    generator = get_schema_view_class().generator_class(get_api_info())
+    schema = generator.get_schema(request=None, public=True)
+    return codecs[format](validators=[]).encode(schema)
+
+
+@functools.cache
+def get_schema_document(format):
+    """
+    Get the schema document, generating it unless a current artifact exists.
+
+    Args:
+        format (str): The document format, ".json" or ".yaml".
+
+    Returns:
+        tuple: The encoded document and its ETag.
+    """
+    content = read_schema_document(format)
+    if content is None:
+        content = generate_schema_document(format)
+    etag = f'"{hashlib.sha256(content).hexdigest()[:32]}"'
+    return content, etag
+
+
+@require_safe
+def schema_document_view(request, format):
+    """
+    Serve the schema document, or 304 if the client's copy is current.
+    """
+    content, etag = get_schema_document(format)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(content, content_type=SCHEMA_CONTENT_TYPES[format])
+    response["ETag"] = etag
+    patch_cache_control(response, public=True, no_cache=True)
+    return response
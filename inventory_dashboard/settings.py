@@ -1,17 +1,12 @@
 from datetime import timedelta
+from importlib.util import find_spec
 import os
 from pathlib import Path
 
 import dj_database_url
-import django_heroku
-from decouple import config
-from rest_framework.pagination import PageNumberPagination
-
-
-class StandardResultsSetPagination(PageNumberPagination):
-    page_size = 10
-    page_size_query_param = "page_size"
-    max_page_size = 100
+import django
+from decouple import Csv, config
+from django.core.exceptions import ImproperlyConfigured
 
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -19,12 +14,20 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = config("SECRET_KEY")
 DEBUG = config("DEBUG", default=False, cast=bool)
+# Keep connections open between requests, checking them before reuse
+DB_CONN_MAX_AGE = config("DB_CONN_MAX_AGE", default=600, cast=int)
+DB_CONN_HEALTH_CHECKS = config("DB_CONN_HEALTH_CHECKS", default=True, cast=bool)
+DB_SSL_REQUIRE = config("DB_SSL_REQUIRE", default=True, cast=bool)
 DEFAULT_DB_URL = dj_database_url.config(
     default=f'sqlite:///{BASE_DIR / "db.sqlite3"}',
+    conn_max_age=DB_CONN_MAX_AGE,
+    conn_health_checks=DB_CONN_HEALTH_CHECKS,
+    ssl_require="DATABASE_URL" in os.environ and DB_SSL_REQUIRE,
 )
 
 
-ALLOWED_HOSTS = []
+# Hosts are checked by the Heroku router
+ALLOWED_HOSTS = ["*"]
 
 
 # Application definition
@@ -45,7 +48,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "whitenoise.middleware.WhiteNoiseMiddleware",
     "corsheaders.middleware.CorsMiddleware",
+    "inventory_dashboard.middleware.CompressionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -87,6 +92,41 @@ DATABASES = {"default": DEFAULT_DB_URL}
 if DATABASES["default"] != DEFAULT_DB_URL:
     DATABASES["default"]["ENGINE"] = "django.db.backends.postgresql"
 
+# Read replicas used by ItemViewSet's read actions, as a comma separated
+# list of database URLs. Locally, a copy of db.sqlite3 works as a replica:
+# DATABASE_REPLICA_URLS=sqlite:///replica.sqlite3
+DATABASE_REPLICAS = []
+for index, url in enumerate(config("DATABASE_REPLICA_URLS", default="", cast=Csv())):
+    alias = f"replica_{index + 1}"
+    DATABASES[alias] = dj_database_url.parse(
+        url,
+        conn_max_age=DB_CONN_MAX_AGE,
+        conn_health_checks=DB_CONN_HEALTH_CHECKS,
+        ssl_require=not url.startswith("sqlite") and DB_SSL_REQUIRE,
+    )
+    DATABASES[alias]["TEST"] = {"MIRROR": "default"}
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["inventory_dashboard.db_router.ReplicaRouter"]
+
+# Seconds a client reads from the primary after writing
+REPLICA_PIN_SECONDS = config("REPLICA_PIN_SECONDS", default=5, cast=int)
+
+# psycopg 3 connection pool, needs Django 5.1+ and replaces persistent connections
+if config("DB_POOL", default=False, cast=bool):
+    if django.VERSION < (5, 1) or find_spec("psycopg_pool") is None:
+        raise ImproperlyConfigured(
+            "DB_POOL needs Django 5.1+ with psycopg 3 and psycopg_pool installed."
+        )
+    if DATABASES["default"]["ENGINE"] != "django.db.backends.postgresql":
+        raise ImproperlyConfigured("DB_POOL is only supported on PostgreSQL.")
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"].setdefault("OPTIONS", {})["pool"] = {
+        "min_size": config("DB_POOL_MIN_SIZE", default=2, cast=int),
+        "max_size": config("DB_POOL_MAX_SIZE", default=10, cast=int),
+        "timeout": config("DB_POOL_TIMEOUT", default=10, cast=int),
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -107,7 +147,7 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 REST_FRAMEWORK = {
-    "DEFAULT_PAGINATION_CLASS": "inventory_dashboard.settings.StandardResultsSetPagination",
+    "DEFAULT_PAGINATION_CLASS": "inventory_dashboard.pagination.StandardResultsSetPagination",
     "PAGE_SIZE": 10,
     "DEFAULT_FILTER_BACKENDS": [
         "rest_framework.filters.OrderingFilter",
@@ -123,10 +163,32 @@ CACHES = {
         "LOCATION": os.environ.get("REDIS_URL", "redis://127.0.0.1:6379/1"),
         "OPTIONS": {
             "CLIENT_CLASS": "django_redis.client.DefaultClient",
+            "SOCKET_CONNECT_TIMEOUT": config("REDIS_CONNECT_TIMEOUT", default=5, cast=int),
+            "SOCKET_TIMEOUT": config("REDIS_TIMEOUT", default=5, cast=int),
+            "CONNECTION_POOL_KWARGS": {
+                "max_connections": config("REDIS_MAX_CONNECTIONS", default=50, cast=int),
+                # Ping connections idle for longer than this before reusing them
+                "health_check_interval": config(
+                    "REDIS_HEALTH_CHECK_INTERVAL", default=30, cast=int
+                ),
+                "retry_on_timeout": True,
+            },
         },
     }
 }
 
+# Recompute the most requested item lists in the background after writes
+ITEM_LIST_CACHE_WARMING = config("ITEM_LIST_CACHE_WARMING", default=True, cast=bool)
+ITEM_LIST_CACHE_WARM_TOP_N = config("ITEM_LIST_CACHE_WARM_TOP_N", default=20, cast=int)
+
+# Server-Sent Events stream of item changes. Every open stream holds a worker,
+# so only enable it with an async gunicorn worker class (GUNICORN_WORKER_CLASS)
+ITEM_CHANGES_STREAM = config("ITEM_CHANGES_STREAM", default=False, cast=bool)
+
+# Days of item changes kept by the prune_item_changes command. Consumers whose
+# cursor is older than this have to resync from /api/items/
+ITEM_CHANGES_RETENTION_DAYS = config("ITEM_CHANGES_RETENTION_DAYS", default=30, cast=int)
+
 CORS_ALLOW_ALL_ORIGINS = True
 
 SIMPLE_JWT = {
@@ -144,8 +206,17 @@ SWAGGER_SETTINGS = {
         }
     },
     "USE_SESSION_AUTH": False,  # Do not use Django's session-based authentication for Swagger UI
+    # Load the cached schema document instead of regenerating it for the UI
+    "SPEC_URL": ("schema-json", {"format": ".json"}),
 }
 
+REDOC_SETTINGS = {
+    "SPEC_URL": ("schema-json", {"format": ".json"}),
+}
+
+# Written by `manage.py generate_openapi_schema`, generated on first request if missing
+OPENAPI_SCHEMA_DIR = config("OPENAPI_SCHEMA_DIR", default=str(BASE_DIR / "openapi"))
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.0/topics/i18n/
@@ -159,15 +230,51 @@ USE_I18N = True
 USE_TZ = True
 
 STATIC_ROOT = os.path.join(BASE_DIR, "staticfiles")
+os.makedirs(STATIC_ROOT, exist_ok=True)
 
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.0/howto/static-files/
 
 STATIC_URL = "static/"
 
+# Served by WhiteNoise, compressed and with hashed names
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {
+        "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage"
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
-django_heroku.settings(locals())
+# The Heroku settings are applied here rather than through
+# django_heroku.settings(), which imports the test framework in every worker.
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "verbose": {
+            "format": "%(asctime)s [%(process)d] [%(levelname)s] "
+            "pathname=%(pathname)s lineno=%(lineno)s "
+            "funcname=%(funcName)s %(message)s",
+            "datefmt": "%Y-%m-%d %H:%M:%S",
+        },
+        "simple": {"format": "%(levelname)s %(message)s"},
+    },
+    "handlers": {
+        "null": {"level": "DEBUG", "class": "logging.NullHandler"},
+        "console": {
+            "level": "DEBUG",
+            "class": "logging.StreamHandler",
+            "formatter": "verbose",
+        },
+    },
+    "loggers": {"testlogger": {"handlers": ["console"], "level": "INFO"}},
+}
+
+# Heroku CI provides the test database
+if "CI" in os.environ:
+    TEST_RUNNER = "django_heroku.HerokuDiscoverRunner"
@@ -5,11 +5,7 @@ URL configuration for inventory_dashboard project.
 
 from django.contrib import admin
 from django.urls import include, path, re_path
-from drf_yasg import openapi
-from drf_yasg.views import get_schema_view
-from rest_framework import permissions
 from rest_framework.routers import DefaultRouter
-from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
@@ -18,16 +14,7 @@ from rest_framework_simplejwt.views import (
 
 from items_management.views import ItemViewSet
 
-schema_view = get_schema_view(
-    openapi.Info(
-        title="Item API",
-        default_version="v1",
-        description="API documentation for Item API",
-    ),
-    public=True,
-    permission_classes=(permissions.AllowAny,),
-    authentication_classes=(JWTAuthentication,),
-)
+from .schema import lazy_schema_view, schema_document_view
 
 
 router = DefaultRouter()
@@ -41,15 +28,13 @@ urlpatterns = [
     path("api/token/verify/", TokenVerifyView.as_view(), name="token_verify"),
     re_path(
         r"^swagger(?P<format>\.json|\.yaml)$",
-        schema_view.without_ui(cache_timeout=0),
+        schema_document_view,
         name="schema-json",
     ),
     re_path(
         r"^swagger/$",
-        schema_view.with_ui("swagger", cache_timeout=0),
+        lazy_schema_view("swagger", cache_timeout=0),
         name="schema-swagger-ui",
     ),
-    re_path(
-        r"^redoc/$", schema_view.with_ui("redoc", cache_timeout=0), name="schema-redoc"
-    ),
+    re_path(r"^redoc/$", lazy_schema_view("redoc", cache_timeout=0), name="schema-redoc"),
 ]
@@ -1,9 +1,57 @@
 from django.contrib import admin
+from django.db import transaction
 
+from . import change_log
 from .models import Item
+from .models import ItemChange
 from .models import Category
 from .models import Tag
 
-admin.site.register(Item)
+
+class ItemAdmin(admin.ModelAdmin):
+    """
+    Admin for items, recording every change in the item change log.
+    """
+
+    def save_related(self, request, form, formsets, change):
+        # Recorded after the tags are saved, so the entry includes them.
+        super().save_related(request, form, formsets, change)
+        change_action = ItemChange.Action.UPDATED if change else ItemChange.Action.CREATED
+        change_log.record(change_action, form.instance)
+
+    def delete_model(self, request, obj):
+        change_log.record(ItemChange.Action.DELETED, obj)
+        super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        # "Delete selected" runs outside the admin's transactions, and the
+        # entries must commit with the deletes while holding the log lock.
+        with transaction.atomic():
+            for obj in queryset:
+                change_log.record(ItemChange.Action.DELETED, obj)
+            super().delete_queryset(request, queryset)
+
+
+class ItemChangeAdmin(admin.ModelAdmin):
+    """
+    Read-only admin for the append-only item change log.
+    """
+
+    list_display = ["id", "SKU", "action", "created_at"]
+    list_filter = ["action"]
+    search_fields = ["SKU"]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+admin.site.register(Item, ItemAdmin)
+admin.site.register(ItemChange, ItemChangeAdmin)
 admin.site.register(Category)
 admin.site.register(Tag)
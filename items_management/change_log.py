@@ -0,0 +1,43 @@
+"""
+Recording of item changes in the append-only ItemChange log.
+"""
+
+from django.db import connection
+
+from .models import ItemChange
+from .serializers import ItemSerializer
+
+# Arbitrary key of the Postgres advisory lock serializing change log inserts
+LOCK_ID = 260026
+
+
+def lock():
+    """
+    Take the change log lock until the current transaction ends.
+    """
+    if connection.vendor != "postgresql":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(%s)", [LOCK_ID])
+
+
+def record(change_action, instance):
+    """
+    Append an entry to the item change log.
+
+    Must be called inside the transaction that applies the change.
+
+    Ids are assigned on insert but become visible on commit, so a
+    transaction holding a lower id could commit after a consumer has
+    already moved its cursor past it. Inserts are therefore serialized
+    with a lock held until commit. SQLite already allows a single writer.
+
+    Args:
+        change_action (str): The kind of change, see ItemChange.Action.
+        instance (Item): The changed item.
+    """
+    lock()
+    data = None
+    if change_action != ItemChange.Action.DELETED:
+        data = ItemSerializer(instance).data
+    ItemChange.objects.create(SKU=instance.SKU, action=change_action, data=data)
@@ -0,0 +1,304 @@
+"""
+Stampede-safe caching of item list responses.
+
+Entries are recomputed by a single request per key (guarded by a cache
+lock), while concurrent requests are served the previous value. Fresh
+entries are also recomputed slightly ahead of their expiry with a
+probability that grows as the expiry approaches, so popular keys rarely
+expire for everyone at once.
+
+Requested lists are also counted, so that the most popular ones can be
+recomputed in the background after invalidation (see warming.py).
+"""
+
+import math
+import random
+import time
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django_redis import get_redis_connection
+
+LIST_CACHE_PREFIX = "item_list_"
+LIST_CACHE_TIMEOUT = 60 * 15
+
+# Stale copies and locks must not match LIST_CACHE_PREFIX, so that they
+# survive clear_list_cache and keep serving while the list is recomputed.
+STALE_CACHE_PREFIX = "stale_item_list_"
+STALE_CACHE_TIMEOUT = 60 * 60
+LOCK_PREFIX = "lock_item_list_"
+LOCK_TIMEOUT = 30
+
+# Higher values recompute earlier, 1.0 is the usual default.
+EARLY_EXPIRATION_BETA = 1.0
+
+WAIT_TIMEOUT = 5
+WAIT_INTERVAL = 0.05
+
+# Like the stale copies, these keys must survive clear_list_cache.
+POPULARITY_KEY = "popular_item_lists"
+# Requests are counted in hourly sets. Popularity sums the last few sets,
+# halving the weight of each older hour, so it follows recent traffic.
+POPULARITY_BUCKET_SECONDS = 60 * 60
+POPULARITY_BUCKETS = 6
+POPULARITY_DECAY = 0.5
+# Sets are trimmed back to MAX_TRACKED_LISTS only once they hold twice as
+# many lists, so that new lists can gather requests before competing.
+MAX_TRACKED_LISTS = 1000
+STATS_KEY = "list_cache_stats"
+GENERATION_KEY = "list_cache_generation"
+
+
+def normalize_path(path, query_params):
+    """
+    Build a canonical path for a list request, independent of parameter order.
+
+    Args:
+        path (str): The request path.
+        query_params (QueryDict): The request query parameters.
+
+    Returns:
+        str: The path followed by the sorted query string, if any.
+    """
+    query = urlencode(sorted(query_params.lists()), doseq=True)
+    return f"{path}?{query}" if query else path
+
+
+def get_cache_key(path):
+    """
+    Get the cache key for a normalized list path.
+    """
+    return f"{LIST_CACHE_PREFIX}{path}"
+
+
+def get_popularity_key(bucket):
+    """
+    Get the cache key of the request counts of an hourly bucket.
+    """
+    return cache.make_key(f"{POPULARITY_KEY}_{bucket}")
+
+
+def get_current_bucket():
+    """
+    Get the number of the hourly bucket counting the current requests.
+    """
+    return int(time.time() // POPULARITY_BUCKET_SECONDS)
+
+
+def get_popular_lists(limit):
+    """
+    Get the most requested lists, weighting recent requests higher.
+
+    Args:
+        limit (int): The number of lists to return.
+
+    Returns:
+        list: The absolute URLs of the lists, most requested first.
+    """
+    current = get_current_bucket()
+    weights = {
+        get_popularity_key(current - age): POPULARITY_DECAY**age
+        for age in range(POPULARITY_BUCKETS)
+    }
+    key = cache.make_key(POPULARITY_KEY)
+    pipeline = get_redis_connection("default").pipeline()
+    pipeline.zunionstore(key, weights)
+    pipeline.zrevrange(key, 0, limit - 1)
+    pipeline.delete(key)
+    urls = pipeline.execute()[1]
+    return [url.decode() for url in urls]
+
+
+def record_stat(name, url=None):
+    """
+    Increment one of the list cache counters and count a request for a list.
+
+    Both are sent in a single pipeline, so each request costs one round
+    trip besides reading the entry.
+
+    Args:
+        name (str): The counter to increment.
+        url (str): The absolute URL of the requested list, with a normalized
+            path. Used to pick the lists worth warming.
+    """
+    connection = get_redis_connection("default")
+    pipeline = connection.pipeline(transaction=False)
+    pipeline.hincrby(cache.make_key(STATS_KEY), name, 1)
+    if url is None:
+        pipeline.execute()
+        return
+
+    key = get_popularity_key(get_current_bucket())
+    pipeline.zincrby(key, 1, url)
+    pipeline.expire(key, POPULARITY_BUCKET_SECONDS * POPULARITY_BUCKETS)
+    pipeline.zcard(key)
+    tracked = pipeline.execute()[-1]
+    if tracked > 2 * MAX_TRACKED_LISTS:
+        connection.zremrangebyrank(key, 0, -MAX_TRACKED_LISTS - 1)
+
+
+def get_stats():
+    """
+    Get the list cache counters.
+
+    Returns:
+        dict: The hit, warm hit, stale hit and miss counts and the share of
+        requests served from warmed entries.
+    """
+    raw = get_redis_connection("default").hgetall(cache.make_key(STATS_KEY))
+    stats = {name: 0 for name in ("hits", "warm_hits", "stale_hits", "misses")}
+    stats.update({name.decode(): int(value) for name, value in raw.items()})
+    total = sum(stats.values())
+    stats["warm_hit_ratio"] = stats["warm_hits"] / total if total else 0.0
+    return stats
+
+
+def reset_stats():
+    """
+    Reset the list cache counters.
+    """
+    get_redis_connection("default").delete(cache.make_key(STATS_KEY))
+
+
+def get_generation():
+    """
+    Get the number of times the list cache has been cleared.
+    """
+    generation = get_redis_connection("default").get(cache.make_key(GENERATION_KEY))
+    return int(generation or 0)
+
+
+def should_recompute(entry):
+    """
+    Decide whether a cached entry should be recomputed before it expires.
+
+    Args:
+        entry (dict): The cached entry.
+
+    Returns:
+        bool: True if this request should recompute the entry.
+    """
+    # log() of a number in (0, 1] is <= 0, so the expiry is moved forward
+    # by a random multiple of the time it took to compute the entry.
+    gap = entry["delta"] * EARLY_EXPIRATION_BETA * math.log(1.0 - random.random())
+    return time.time() - gap >= entry["expiry"]
+
+
+def compute_and_store(key, compute, warmed=False):
+    """
+    Compute a value and store it as both the fresh and the stale entry.
+
+    The value is not kept if the cache is cleared while it is computed, as
+    it may have been read before the write that cleared the cache.
+
+    Args:
+        key (str): The cache key.
+        compute (callable): Function returning the value to cache.
+        warmed (bool): Whether the value is computed ahead of any request.
+
+    Returns:
+        The computed value.
+    """
+    generation = get_generation()
+    start = time.time()
+    data = compute()
+    now = time.time()
+    if get_generation() != generation:
+        return data
+    entry = {
+        "data": data,
+        "delta": now - start,
+        "expiry": now + LIST_CACHE_TIMEOUT,
+        "warmed": warmed,
+    }
+    cache.set(key, entry, timeout=LIST_CACHE_TIMEOUT)
+    cache.set(STALE_CACHE_PREFIX + key, entry, timeout=STALE_CACHE_TIMEOUT)
+    # clear() bumps the generation before deleting, so a clear racing with
+    # the writes above either deletes the entry itself or is seen here.
+    if get_generation() != generation:
+        cache.delete(key)
+    return data
+
+
+def get_or_compute(key, compute, url=None, allow_stale=True):
+    """
+    Get a cached value, recomputing it at most once across concurrent requests.
+
+    Args:
+        key (str): The cache key.
+        compute (callable): Function returning the value to cache.
+        url (str): The absolute URL of the requested list, counted along
+            with the cache statistics (see record_stat).
+        allow_stale (bool): Whether the stale copy may be served while the
+            value is recomputed. Clients that must see their own writes
+            wait for the recomputation instead.
+
+    Returns:
+        The cached or computed value.
+    """
+    entry = cache.get(key)
+    if entry is not None and not should_recompute(entry):
+        record_stat("warm_hits" if entry.get("warmed") else "hits", url)
+        return entry["data"]
+
+    lock_key = LOCK_PREFIX + key
+    if cache.add(lock_key, 1, timeout=LOCK_TIMEOUT):
+        try:
+            record_stat("misses", url)
+            return compute_and_store(key, compute)
+        finally:
+            cache.delete(lock_key)
+
+    # Another request is recomputing this key, serve the previous value.
+    if entry is not None:
+        record_stat("hits", url)
+        return entry["data"]
+    if allow_stale:
+        entry = cache.get(STALE_CACHE_PREFIX + key)
+        if entry is not None:
+            record_stat("stale_hits", url)
+            return entry["data"]
+
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(WAIT_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            record_stat("hits", url)
+            return entry["data"]
+    record_stat("misses", url)
+    return compute_and_store(key, compute)
+
+
+def warm(key, compute):
+    """
+    Compute and store a value unless a fresh one is cached or being computed.
+
+    Args:
+        key (str): The cache key.
+        compute (callable): Function returning the value to cache.
+
+    Returns:
+        bool: True if the value was computed.
+    """
+    if cache.get(key) is not None:
+        return False
+
+    lock_key = LOCK_PREFIX + key
+    if not cache.add(lock_key, 1, timeout=LOCK_TIMEOUT):
+        return False
+    try:
+        compute_and_store(key, compute, warmed=True)
+    finally:
+        cache.delete(lock_key)
+    return True
+
+
+def clear():
+    """
+    Invalidate all cached item lists, keeping their stale copies.
+
+    Lists being computed while the cache is cleared are not stored.
+    """
+    get_redis_connection("default").incr(cache.make_key(GENERATION_KEY))
+    cache.delete_pattern(f"{LIST_CACHE_PREFIX}*")
@@ -0,0 +1,85 @@
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from items_management import list_cache
+from items_management.models import Item
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the latency of the items endpoints with a new database "
+        "connection per request and with persistent connections. The list "
+        "cache is cleared before every request, so lists hit the database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("username", help="User to authenticate the requests as.")
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=200,
+            help="Number of requests per endpoint and connection mode.",
+        )
+        parser.add_argument(
+            "--database", default="default", help="Database alias to benchmark."
+        )
+
+    def handle(self, *args, **options):
+        if options["requests"] < 2:
+            raise CommandError("At least 2 requests are needed per endpoint.")
+
+        try:
+            user = get_user_model().objects.get(username=options["username"])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"User {options['username']!r} does not exist.")
+
+        item = Item.objects.first()
+        if item is None:
+            raise CommandError("There are no items to retrieve.")
+
+        client = Client(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+        urls = {
+            "retrieve": reverse("items-detail", kwargs={"SKU": item.SKU}),
+            "list": reverse("items-list") + "?page_size=10",
+        }
+
+        # django.test.Client does not send the request_finished signal that
+        # closes connections, so the connection is closed by hand instead.
+        connection = connections[options["database"]]
+        modes = {"new connection": True, "persistent": False}
+
+        try:
+            for mode, close_connection in modes.items():
+                connection.close()
+                for name, url in urls.items():
+                    timings = self.measure(
+                        client, url, options["requests"], connection, close_connection
+                    )
+                    self.stdout.write(
+                        f"{name:<9} {mode:<15} "
+                        f"mean {statistics.mean(timings):7.2f} ms  "
+                        f"p50 {statistics.median(timings):7.2f} ms  "
+                        f"p95 {statistics.quantiles(timings, n=20)[-1]:7.2f} ms"
+                    )
+        finally:
+            connection.close()
+
+    def measure(self, client, url, count, connection, close_connection):
+        timings = []
+        for __ in range(count):
+            list_cache.clear()
+            start = time.perf_counter()
+            response = client.get(url)
+            timings.append((time.perf_counter() - start) * 1000)
+            if close_connection:
+                connection.close()
+            if response.status_code != 200:
+                raise CommandError(f"GET {url} returned {response.status_code}.")
+        return timings
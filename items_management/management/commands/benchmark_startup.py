@@ -0,0 +1,96 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Runs in a fresh interpreter: loads the WSGI application and the URL conf
+# like a gunicorn worker does, then forks a child the way a preloading
+# master does and measures the memory the child does not share with it.
+WORKER_SCRIPT = """
+import gc, json, os, resource, time
+
+def memory_kb(field_names, path):
+    try:
+        with open(path) as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return None
+    total = 0
+    for line in lines:
+        name, _, value = line.partition(":")
+        if name in field_names:
+            total += int(value.split()[0])
+    return total
+
+start = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+from django.urls import get_resolver
+get_resolver().url_patterns
+startup = time.perf_counter() - start
+
+read_fd, write_fd = os.pipe()
+pid = os.fork()
+if pid == 0:
+    gc.collect()  # touches every object, like a worker's first collections
+    private = memory_kb(
+        ("Private_Clean", "Private_Dirty"), "/proc/self/smaps_rollup"
+    )
+    os.write(write_fd, json.dumps(private).encode())
+    os._exit(0)
+os.waitpid(pid, 0)
+forked_private_kb = json.loads(os.read(read_fd, 64))
+
+print(json.dumps({
+    "startup": startup,
+    "rss_kb": memory_kb(("VmRSS",), "/proc/self/status")
+    or resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "forked_private_kb": forked_private_kb,
+}))
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the startup time and memory of a worker process, with and "
+        "without preloading the application in the master."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--runs", type=int, default=5, help="Number of worker processes to start."
+        )
+
+    def handle(self, *args, **options):
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": settings.SETTINGS_MODULE}
+        results = []
+        for __ in range(options["runs"]):
+            output = subprocess.run(
+                [sys.executable, "-c", WORKER_SCRIPT],
+                env=env,
+                capture_output=True,
+                check=True,
+                text=True,
+            ).stdout
+            results.append(json.loads(output.splitlines()[-1]))
+
+        startup = [result["startup"] for result in results]
+        rss = [result["rss_kb"] for result in results]
+        self.stdout.write(
+            f"Startup time: median {statistics.median(startup) * 1000:.0f} ms, "
+            f"min {min(startup) * 1000:.0f} ms over {len(results)} runs"
+        )
+        self.stdout.write(
+            f"RSS per worker without preload: {statistics.median(rss) / 1024:.1f} MiB"
+        )
+
+        private = [result["forked_private_kb"] for result in results]
+        if None not in private:
+            self.stdout.write(
+                "Private memory per worker with preload: "
+                f"{statistics.median(private) / 1024:.1f} MiB"
+            )
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from inventory_dashboard.schema import SCHEMA_CONTENT_TYPES, write_schema_document
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate the OpenAPI schema documents served at /swagger.json and "
+        "/swagger.yaml. Run on deploy so workers never generate them."
+    )
+
+    def handle(self, *args, **options):
+        for format in SCHEMA_CONTENT_TYPES:
+            path = write_schema_document(format)
+            self.stdout.write(f"Wrote {path}")
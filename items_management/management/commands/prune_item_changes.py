@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from items_management.models import ItemChange
+
+
+class Command(BaseCommand):
+    help = "Delete item change log entries older than the retention period."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=None,
+            help="Number of days of changes to keep "
+            "(defaults to ITEM_CHANGES_RETENTION_DAYS).",
+        )
+
+    def handle(self, *args, **options):
+        days = options["days"]
+        if days is None:
+            days = settings.ITEM_CHANGES_RETENTION_DAYS
+        cutoff = timezone.now() - timedelta(days=days)
+        deleted, _ = ItemChange.objects.filter(created_at__lt=cutoff).delete()
+        self.stdout.write(f"Deleted {deleted} item change(s) older than {days} day(s).")
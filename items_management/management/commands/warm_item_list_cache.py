@@ -0,0 +1,59 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from items_management import list_cache, warming
+
+
+class Command(BaseCommand):
+    help = "Compute and cache the most requested item lists."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--top",
+            type=int,
+            default=None,
+            help="Number of most requested lists to warm "
+            "(defaults to ITEM_LIST_CACHE_WARM_TOP_N).",
+        )
+        parser.add_argument(
+            "--daemon",
+            action="store_true",
+            help="Keep running and warm the lists every --interval seconds.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=30,
+            help="Seconds between warming runs in daemon mode.",
+        )
+        parser.add_argument(
+            "--stats",
+            action="store_true",
+            help="Print the list cache hit counters and exit.",
+        )
+        parser.add_argument(
+            "--reset-stats",
+            action="store_true",
+            help="Reset the list cache hit counters and exit.",
+        )
+
+    def handle(self, *args, **options):
+        if options["reset_stats"]:
+            list_cache.reset_stats()
+            self.stdout.write("List cache counters reset.")
+            return
+
+        if options["stats"]:
+            stats = list_cache.get_stats()
+            for name in ("hits", "warm_hits", "stale_hits", "misses"):
+                self.stdout.write(f"{name}: {stats[name]}")
+            self.stdout.write(f"warm_hit_ratio: {stats['warm_hit_ratio']:.2%}")
+            return
+
+        while True:
+            warmed = warming.warm_popular_lists(options["top"])
+            self.stdout.write(f"Warmed {warmed} item list(s).")
+            if not options["daemon"]:
+                break
+            time.sleep(options["interval"])
@@ -70,3 +70,45 @@ class Item(models.Model):
 
     def __str__(self):
         return f"{self.name} ({self.SKU})"
+
+
+class ItemChange(models.Model):
+    """
+    Represents an entry in the append-only change log of inventory items.
+
+    Entries are written in the same transaction as the change they record.
+    Inserts are serialized until that transaction commits (see
+    change_log.record), so entries become visible in id order and
+    the id can be used by consumers as a cursor.
+
+    Attributes:
+    - SKU: The stock keeping unit of the changed item.
+    - action: The kind of change applied to the item.
+    - data: The serialized item after the change, empty for deletions.
+    - created_at: The time the change was recorded.
+    """
+
+    class Action(models.TextChoices):
+        """
+        Represents the kind of change applied to an item.
+
+        Possible values:
+        - CREATED: Item was created.
+        - UPDATED: Item was updated.
+        - DELETED: Item was deleted.
+        """
+
+        CREATED = "created", _("Created")
+        UPDATED = "updated", _("Updated")
+        DELETED = "deleted", _("Deleted")
+
+    SKU = models.CharField(max_length=50)
+    action = models.CharField(max_length=7, choices=Action.choices)
+    data = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["id"]
+
+    def __str__(self):
+        return f"{self.action} {self.SKU} (#{self.pk})"
@@ -0,0 +1,144 @@
+import importlib.util
+import io
+import json
+
+from rest_framework.renderers import BaseRenderer
+
+# The binary formats are optional and only imported when first rendered,
+# pyarrow alone adds tens of megabytes to every worker.
+MSGPACK_AVAILABLE = importlib.util.find_spec("msgpack") is not None
+PYARROW_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    Renderer for Server-Sent Events responses.
+
+    The event stream itself is produced by a streaming response, this
+    renderer only makes `text/event-stream` negotiable for the view.
+    """
+
+    media_type = "text/event-stream"
+    format = "sse"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return f"event: error\ndata: {json.dumps(data)}\n\n".encode(self.charset)
+
+
+def encode_msgpack_default(value):
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    Renderer for MessagePack responses.
+    """
+
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        import msgpack
+
+        if data is None:
+            return b""
+        return msgpack.packb(data, default=encode_msgpack_default)
+
+
+class ArrowRenderer(BaseRenderer):
+    """
+    Renderer for Apache Arrow IPC stream responses.
+
+    Accepts columnar data (a dict of equally long lists), a list of rows,
+    or a paginated response whose remaining keys (count, next, previous)
+    are stored in the schema metadata.
+    """
+
+    media_type = "application/vnd.apache.arrow.stream"
+    format = "arrow"
+    charset = None
+    render_style = "binary"
+    batch_size = 64 * 1024
+
+    def get_table(self, data):
+        import pyarrow
+
+        if isinstance(data, list):
+            return pyarrow.Table.from_pylist(data)
+        if isinstance(data, dict) and isinstance(data.get("results"), list):
+            metadata = {
+                key: json.dumps(value) for key, value in data.items() if key != "results"
+            }
+            return pyarrow.Table.from_pylist(data["results"]).replace_schema_metadata(
+                metadata
+            )
+        if isinstance(data, dict) and all(isinstance(v, list) for v in data.values()):
+            return pyarrow.Table.from_pydict(data)
+        return pyarrow.Table.from_pylist([data])
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        import pyarrow
+        import pyarrow.ipc
+
+        if data is None:
+            return b""
+        table = self.get_table(data)
+        sink = pyarrow.BufferOutputStream()
+        with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table, max_chunksize=self.batch_size)
+        return sink.getvalue().to_pybytes()
+
+    def render_batches(self, batches, field_types):
+        """
+        Render columnar batches as an IPC stream, one record batch at a time.
+
+        Args:
+            batches (iterable): Dicts of equally long lists, one per field.
+            field_types (dict): The Python type of each field's values, str,
+                int or list (of strings).
+
+        Yields:
+            bytes: The IPC stream, in one piece per record batch.
+        """
+        import pyarrow
+        import pyarrow.ipc
+
+        arrow_types = {
+            str: pyarrow.string(),
+            int: pyarrow.int64(),
+            list: pyarrow.list_(pyarrow.string()),
+        }
+        schema = pyarrow.schema(
+            [(field, arrow_types[value_type]) for field, value_type in field_types.items()]
+        )
+        sink = io.BytesIO()
+        with pyarrow.ipc.new_stream(sink, schema) as writer:
+            for batch in batches:
+                writer.write_batch(pyarrow.RecordBatch.from_pydict(batch, schema=schema))
+                yield drain(sink)
+        yield drain(sink)
+
+
+def drain(buffer):
+    """
+    Take the bytes written to a BytesIO so far and empty it.
+    """
+    value = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return value
+
+
+# Binary formats offered by content negotiation when their package is installed
+BINARY_RENDERER_CLASSES = []
+if MSGPACK_AVAILABLE:
+    BINARY_RENDERER_CLASSES.append(MessagePackRenderer)
+if PYARROW_AVAILABLE:
+    BINARY_RENDERER_CLASSES.append(ArrowRenderer)
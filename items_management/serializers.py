@@ -1,6 +1,6 @@
 
 from rest_framework import serializers
-from .models import Item, Category, Tag
+from .models import Item, ItemChange, Category, Tag
 
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -15,7 +15,22 @@ class TagSerializer(serializers.ModelSerializer):
         fields = ['name']
 
 
-class ItemSerializer(serializers.ModelSerializer):
+class DynamicFieldsModelSerializer(serializers.ModelSerializer):
+    """
+    A ModelSerializer that takes an additional `fields` argument that
+    controls which fields should be displayed.
+    """
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+
+        if fields is not None:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+
+
+class ItemSerializer(DynamicFieldsModelSerializer):
     category = CategorySerializer(read_only=True)
     tags = TagSerializer(read_only=True, many=True)
 
@@ -23,3 +38,9 @@ class ItemSerializer(serializers.ModelSerializer):
         model = Item
         fields = ['SKU', 'name', 'category', 'tags',
                   'stock_status', 'in_stock', 'available_stock']
+
+
+class ItemChangeSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ItemChange
+        fields = ['id', 'SKU', 'action', 'data', 'created_at']
@@ -1,10 +1,36 @@
+import importlib
+import io
+import os
+import runpy
+import tempfile
+import time
+from datetime import timedelta
+from unittest import mock, skipUnless
+
+import redis
+from django.conf import settings
+from django.contrib import admin
 from django.contrib.auth.models import User
 from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import override_settings
 from django.urls import reverse
+from django.utils import timezone
+from django_redis import get_redis_connection
 from rest_framework import status
 from rest_framework.test import APIClient, APITestCase
 
-from .models import Category, Item, Tag
+from inventory_dashboard import db_router, schema
+from inventory_dashboard import settings as settings_module
+from inventory_dashboard.middleware import CompressionMiddleware
+
+from . import change_log, list_cache, warming
+from .models import Category, Item, ItemChange, Tag
+from .renderers import MSGPACK_AVAILABLE, PYARROW_AVAILABLE
+from .serializers import ItemSerializer
+from .views import ItemViewSet
 
 
 class ItemViewSetTestCase(APITestCase):
@@ -163,3 +189,835 @@ class ItemViewSetTestCase(APITestCase):
         self.client.delete(detail_url)
 
         self.assertIsNone(cache.get(f"item_list_{list_url}"))
+
+
+class CachedAPITestCase(APITestCase):
+    """
+    Base test case with an authenticated client and an empty cache.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", password="testpassword"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.list_url = reverse("items-list")
+
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+
+class ItemChangeFeedTestCase(CachedAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.category = Category.objects.create(name="Art Supplies")
+
+    def create_item(self, sku):
+        data = {
+            "SKU": sku,
+            "name": "New Item",
+            "category": self.category.id,
+            "stock_status": "IN",
+            "in_stock": 20,
+            "available_stock": 10,
+        }
+        return self.client.post(reverse("items-list"), data, format="json")
+
+    def test_writes_are_recorded(self):
+        self.create_item("NEW123")
+        detail_url = reverse("items-detail", kwargs={"SKU": "NEW123"})
+        self.client.patch(detail_url, {"name": "Renamed Item"}, format="json")
+        self.client.delete(detail_url)
+
+        changes = list(ItemChange.objects.values_list("SKU", "action"))
+        self.assertEqual(
+            changes,
+            [
+                ("NEW123", ItemChange.Action.CREATED),
+                ("NEW123", ItemChange.Action.UPDATED),
+                ("NEW123", ItemChange.Action.DELETED),
+            ],
+        )
+        self.assertEqual(ItemChange.objects.get(action="updated").data["name"], "Renamed Item")
+        self.assertIsNone(ItemChange.objects.get(action="deleted").data)
+
+    def test_changes_since_cursor(self):
+        url = reverse("items-changes")
+        self.create_item("NEW1")
+        self.create_item("NEW2")
+
+        response = self.client.get(url, {"limit": 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([c["SKU"] for c in response.data["results"]], ["NEW1"])
+        self.assertTrue(response.data["has_more"])
+
+        response = self.client.get(url, {"since": response.data["next_cursor"]})
+        self.assertEqual([c["SKU"] for c in response.data["results"]], ["NEW2"])
+        self.assertFalse(response.data["has_more"])
+
+        cursor = response.data["next_cursor"]
+        response = self.client.get(url, {"since": cursor})
+        self.assertEqual(response.data["results"], [])
+        self.assertEqual(response.data["next_cursor"], cursor)
+
+    def test_gevent_workers_are_not_preloaded(self):
+        config_path = settings.BASE_DIR / "gunicorn.conf.py"
+        with mock.patch.dict(os.environ, {"GUNICORN_WORKER_CLASS": "gevent"}):
+            gunicorn_config = runpy.run_path(config_path)
+        self.assertFalse(gunicorn_config["preload_app"])
+
+        with mock.patch.dict(
+            os.environ, {"GUNICORN_WORKER_CLASS": "gevent", "GUNICORN_PRELOAD": "True"}
+        ):
+            self.assertTrue(runpy.run_path(config_path)["preload_app"])
+        self.assertTrue(runpy.run_path(config_path)["preload_app"])
+
+    def test_admin_writes_are_recorded_and_log_is_read_only(self):
+        self.create_item("NEW123")
+        admin_user = User.objects.create_superuser(
+            username="admin", password="adminpassword"
+        )
+        self.client.force_login(admin_user)
+
+        item = Item.objects.get(SKU="NEW123")
+        response = self.client.post(
+            reverse("admin:items_management_item_delete", args=[item.pk]),
+            {"post": "yes"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_302_FOUND)
+        self.assertEqual(
+            ItemChange.objects.last().action, ItemChange.Action.DELETED
+        )
+
+        change = ItemChange.objects.first()
+        for url in (
+            reverse("admin:items_management_itemchange_add"),
+            reverse("admin:items_management_itemchange_delete", args=[change.pk]),
+        ):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        response = self.client.post(
+            reverse("admin:items_management_itemchange_change", args=[change.pk]),
+            {"SKU": "EDITED"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        change.refresh_from_db()
+        self.assertEqual(change.SKU, "NEW123")
+
+    def test_admin_bulk_delete_is_atomic(self):
+        self.create_item("NEW1")
+        self.create_item("NEW2")
+        admin_user = User.objects.create_superuser(
+            username="admin", password="adminpassword"
+        )
+        self.client.force_login(admin_user)
+        data = {
+            "action": "delete_selected",
+            "post": "yes",
+            "_selected_action": list(
+                Item.objects.filter(SKU__startswith="NEW").values_list("pk", flat=True)
+            ),
+        }
+        changelist_url = reverse("admin:items_management_item_changelist")
+
+        with mock.patch.object(
+            admin.ModelAdmin, "delete_queryset", side_effect=RuntimeError
+        ), self.assertRaises(RuntimeError):
+            self.client.post(changelist_url, data)
+        self.assertEqual(ItemChange.objects.count(), 2)
+
+        self.client.post(changelist_url, data)
+        self.assertEqual(
+            ItemChange.objects.filter(action=ItemChange.Action.DELETED).count(), 2
+        )
+        self.assertFalse(Item.objects.filter(SKU__startswith="NEW").exists())
+
+    def test_prune_item_changes(self):
+        self.create_item("OLD1")
+        self.create_item("NEW1")
+        ItemChange.objects.filter(SKU="OLD1").update(
+            created_at=timezone.now() - timedelta(days=31)
+        )
+
+        out = io.StringIO()
+        call_command("prune_item_changes", "--days", "30", stdout=out)
+
+        self.assertIn("Deleted 1 item change(s)", out.getvalue())
+        self.assertEqual(
+            list(ItemChange.objects.values_list("SKU", flat=True)), ["NEW1"]
+        )
+
+    def test_change_log_inserts_are_serialized(self):
+        changes_before_lock = []
+        with mock.patch.object(
+            change_log,
+            "lock",
+            side_effect=lambda: changes_before_lock.append(ItemChange.objects.count()),
+        ):
+            self.create_item("NEW1")
+        self.assertEqual(changes_before_lock, [0])
+
+        with mock.patch.object(connection, "vendor", "postgresql"), mock.patch.object(
+            connection, "cursor"
+        ) as cursor:
+            change_log.lock()
+        cursor.return_value.__enter__.return_value.execute.assert_called_once_with(
+            "SELECT pg_advisory_xact_lock(%s)", [change_log.LOCK_ID]
+        )
+
+    def test_changes_invalid_cursor(self):
+        response = self.client.get(reverse("items-changes"), {"since": "abc"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_changes_stream_disabled(self):
+        response = self.client.get(
+            reverse("items-changes-stream"), HTTP_ACCEPT="text/event-stream"
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(ITEM_CHANGES_STREAM=True)
+    def test_changes_stream(self):
+        self.create_item("NEW1")
+        self.create_item("NEW2")
+        first = ItemChange.objects.first()
+
+        with mock.patch.object(ItemViewSet, "changes_stream_timeout", 0):
+            response = self.client.get(
+                reverse("items-changes-stream"),
+                HTTP_ACCEPT="text/event-stream",
+                HTTP_LAST_EVENT_ID=str(first.id),
+            )
+            body = b"".join(response.streaming_content).decode()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertNotIn('"NEW1"', body)
+        self.assertIn("event: created", body)
+        self.assertIn('"NEW2"', body)
+
+
+class ListCacheTestCase(CachedAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.cache_key = f"item_list_{self.list_url}"
+
+    def test_stale_value_served_while_recomputing(self):
+        self.client.get(self.list_url)
+        list_cache.clear()
+        self.assertIsNone(cache.get(self.cache_key))
+
+        # Another request holds the recomputation lock.
+        cache.add(list_cache.LOCK_PREFIX + self.cache_key, 1)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.list_url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue("results" in response.data)
+
+    def test_waits_for_recomputation_without_stale_value(self):
+        cache.add(list_cache.LOCK_PREFIX + self.cache_key, 1)
+
+        with mock.patch.object(list_cache, "WAIT_TIMEOUT", 0):
+            response = self.client.get(self.list_url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNotNone(cache.get(self.cache_key))
+
+    def test_early_expiration(self):
+        entry = {"data": None, "delta": 1.0, "expiry": time.time() + 60}
+        with mock.patch("random.random", return_value=0.5):
+            self.assertFalse(list_cache.should_recompute(entry))
+
+        entry["expiry"] = time.time() + 0.5
+        with mock.patch("random.random", return_value=0.5):
+            self.assertTrue(list_cache.should_recompute(entry))
+        self.assertTrue(list_cache.should_recompute({**entry, "expiry": time.time()}))
+
+    def test_single_computation_per_key(self):
+        compute = mock.Mock(return_value={"results": []})
+
+        list_cache.get_or_compute(self.cache_key, compute)
+        list_cache.get_or_compute(self.cache_key, compute)
+
+        compute.assert_called_once()
+
+    def test_value_computed_across_clear_is_not_stored(self):
+        def compute():
+            list_cache.clear()
+            return {"results": []}
+
+        self.assertEqual(
+            list_cache.get_or_compute(self.cache_key, compute), {"results": []}
+        )
+        self.assertIsNone(cache.get(self.cache_key))
+
+        self.assertTrue(list_cache.warm(self.cache_key, compute))
+        self.assertIsNone(cache.get(self.cache_key))
+
+    def test_clear_racing_with_store_removes_value(self):
+        generations = iter([0, 0, 1])
+        with mock.patch.object(
+            list_cache, "get_generation", side_effect=lambda: next(generations)
+        ):
+            list_cache.compute_and_store(self.cache_key, lambda: {"results": []})
+
+        self.assertIsNone(cache.get(self.cache_key))
+
+
+class ListCacheWarmingTestCase(CachedAPITestCase):
+
+    def test_requests_are_normalized_and_counted(self):
+        self.client.get(self.list_url + "?page_size=5&ordering=name")
+        self.client.get(self.list_url + "?ordering=name&page_size=5")
+        self.client.get(self.list_url)
+
+        popular = list_cache.get_popular_lists(10)
+        self.assertEqual(
+            popular,
+            [
+                f"http://testserver{self.list_url}?ordering=name&page_size=5",
+                f"http://testserver{self.list_url}",
+            ],
+        )
+
+    def test_cache_hit_round_trips(self):
+        self.client.get(self.list_url)
+
+        with mock.patch.object(
+            redis.Redis,
+            "execute_command",
+            autospec=True,
+            side_effect=redis.Redis.execute_command,
+        ) as command, mock.patch.object(
+            redis.client.Pipeline,
+            "execute",
+            autospec=True,
+            side_effect=redis.client.Pipeline.execute,
+        ) as pipeline:
+            self.client.get(self.list_url)
+
+        # Reading the entry, then the counters and popularity in one pipeline.
+        # Without replicas, the primary pin is not looked up.
+        self.assertEqual(command.call_count + pipeline.call_count, 2)
+        self.assertEqual(list_cache.get_stats()["hits"], 1)
+        self.assertEqual(
+            list_cache.get_popular_lists(1), [f"http://testserver{self.list_url}"]
+        )
+
+    def test_new_list_is_tracked_when_sets_are_full(self):
+        old_urls = {f"http://testserver/old/{index}": 2 for index in range(10)}
+        bucket = list_cache.get_current_bucket()
+        redis_connection = get_redis_connection("default")
+        redis_connection.zadd(list_cache.get_popularity_key(bucket - 1), old_urls)
+        redis_connection.zadd(list_cache.get_popularity_key(bucket), old_urls)
+
+        with mock.patch.object(list_cache, "MAX_TRACKED_LISTS", 10):
+            for __ in range(5):
+                list_cache.record_stat("hits", "http://testserver/new")
+
+        self.assertEqual(list_cache.get_popular_lists(1), ["http://testserver/new"])
+
+    def test_popularity_decays(self):
+        bucket = list_cache.get_current_bucket()
+        redis_connection = get_redis_connection("default")
+        redis_connection.zadd(
+            list_cache.get_popularity_key(bucket - 2), {"http://testserver/old": 10}
+        )
+        redis_connection.zadd(
+            list_cache.get_popularity_key(bucket), {"http://testserver/recent": 3}
+        )
+        redis_connection.zadd(
+            list_cache.get_popularity_key(bucket - list_cache.POPULARITY_BUCKETS),
+            {"http://testserver/expired": 100},
+        )
+
+        self.assertEqual(
+            list_cache.get_popular_lists(10),
+            ["http://testserver/recent", "http://testserver/old"],
+        )
+
+    def test_popular_lists_are_warmed_after_invalidation(self):
+        self.client.get(self.list_url + "?ordering=name")
+        cached = self.client.get(self.list_url + "?ordering=name").data
+        list_cache.clear()
+
+        self.assertEqual(warming.warm_popular_lists(), 1)
+        self.assertEqual(warming.warm_popular_lists(), 0)
+
+        response = self.client.get(self.list_url + "?ordering=name")
+        self.assertEqual(response.data, cached)
+        stats = list_cache.get_stats()
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["warm_hits"], 1)
+
+    def test_warming_scheduled_on_commit(self):
+        data = {
+            "SKU": "NEW123",
+            "name": "New Item",
+            "stock_status": "IN",
+            "in_stock": 20,
+            "available_stock": 10,
+        }
+        with mock.patch.object(warming, "schedule") as schedule:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(self.list_url, data, format="json")
+
+        schedule.assert_called_once()
+
+
+class PaginationCountTestCase(CachedAPITestCase):
+
+    def test_count_is_cached_per_filter(self):
+        response = self.client.get(self.list_url, {"stock_status": "IN"})
+        expected = Item.objects.filter(stock_status="IN").count()
+        self.assertEqual(response.data["count"], expected)
+
+        count_key = f"item_list_count_{self.list_url}?stock_status=IN"
+        self.assertEqual(cache.get(count_key), (expected, False))
+
+        # A different page of the same filter reuses the cached count.
+        cache.set(count_key, (999, False))
+        response = self.client.get(self.list_url, {"stock_status": "IN", "page_size": 5})
+        self.assertEqual(response.data["count"], 999)
+
+    def test_count_cache_cleared_on_write(self):
+        self.client.get(self.list_url)
+        self.assertIsNotNone(cache.get(f"item_list_count_{self.list_url}"))
+
+        self.client.delete(reverse("items-detail", kwargs={"SKU": Item.objects.first().SKU}))
+
+        self.assertIsNone(cache.get(f"item_list_count_{self.list_url}"))
+
+    def test_count_taken_across_clear_is_not_cached(self):
+        def clear_during_count(queryset):
+            list_cache.clear()
+
+        with mock.patch(
+            "inventory_dashboard.pagination.StandardResultsSetPagination"
+            ".get_estimated_count",
+            side_effect=clear_during_count,
+        ):
+            response = self.client.get(self.list_url)
+
+        self.assertEqual(response.data["count"], Item.objects.count())
+        self.assertIsNone(cache.get(f"item_list_count_{self.list_url}"))
+
+    def test_estimated_count_does_not_bound_pages(self):
+        total = Item.objects.count()
+        pagination = "inventory_dashboard.pagination.StandardResultsSetPagination"
+        with mock.patch(f"{pagination}.get_estimated_count", return_value=5):
+            response = self.client.get(self.list_url, {"page_size": 10})
+            self.assertEqual(response.data["count"], 5)
+            self.assertTrue(response.data["count_estimated"])
+            self.assertIsNotNone(response.data["next"])
+
+            last_page = (total - 1) // 10 + 1
+            response = self.client.get(
+                self.list_url, {"page_size": 10, "page": last_page}
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(response.data["results"]), total - (last_page - 1) * 10)
+            self.assertIsNone(response.data["next"])
+
+            response = self.client.get(self.list_url, {"page": "last"})
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        cache.clear()
+        with mock.patch(f"{pagination}.get_estimated_count", return_value=total * 10):
+            response = self.client.get(
+                self.list_url, {"page_size": 10, "page": last_page + 1}
+            )
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_count_opt_out(self):
+        page_size = Item.objects.count() - 1
+        response = self.client.get(self.list_url, {"count": "false", "page_size": page_size})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("count", response.data)
+        self.assertEqual(len(response.data["results"]), page_size)
+        self.assertIsNotNone(response.data["next"])
+
+        response = self.client.get(response.data["next"])
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertIsNone(response.data["next"])
+        self.assertIsNotNone(response.data["previous"])
+
+        response = self.client.get(
+            self.list_url, {"count": "false", "page_size": page_size, "page": 3}
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_count_opt_out_does_not_count(self):
+        # The page of items and their tags, without a COUNT(*)
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                self.list_url, {"count": "false", "fields": "SKU,tags"}
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("count", response.data)
+        self.assertIsNone(cache.get(f"item_list_count_{self.list_url}"))
+
+
+class SparseFieldsetTestCase(CachedAPITestCase):
+
+    def test_fields(self):
+        response = self.client.get(self.list_url, {"fields": "SKU,in_stock"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        for item in response.data["results"]:
+            self.assertEqual(set(item), {"SKU", "in_stock"})
+
+    def test_exclude(self):
+        sku = Item.objects.first().SKU
+        url = reverse("items-detail", kwargs={"SKU": sku})
+        response = self.client.get(url, {"exclude": "category,tags"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            set(response.data),
+            {"SKU", "name", "stock_status", "in_stock", "available_stock"},
+        )
+
+    def test_unknown_field(self):
+        response = self.client.get(self.list_url, {"fields": "SKU,price"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_unrequested_relations_are_not_loaded(self):
+        # One query for the count and one for the page, no tag prefetch.
+        with self.assertNumQueries(2):
+            self.client.get(self.list_url, {"fields": "SKU,name"})
+        cache.clear()
+        # The tags are prefetched in a single extra query.
+        with self.assertNumQueries(3):
+            self.client.get(self.list_url, {"fields": "SKU,category,tags"})
+
+
+class CompressionTestCase(CachedAPITestCase):
+
+    def test_gzip(self):
+        response = self.client.get(self.list_url, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+
+    def test_uncompressed(self):
+        response = self.client.get(self.list_url)
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    def test_preferred_encoding(self):
+        middleware = CompressionMiddleware(lambda request: None)
+        request = mock.Mock(META={"HTTP_ACCEPT_ENCODING": "gzip, br;q=0.5, zstd"})
+        with mock.patch.dict(
+            CompressionMiddleware.compressors, {"br": None, "zstd": None}, clear=True
+        ):
+            self.assertEqual(middleware.get_encoding(request), "zstd")
+            request.META["HTTP_ACCEPT_ENCODING"] = "gzip, br;q=0.5"
+            self.assertIsNone(middleware.get_encoding(request))
+            request.META["HTTP_ACCEPT_ENCODING"] = "br, gzip;q=0.5"
+            self.assertEqual(middleware.get_encoding(request), "br")
+        with mock.patch.dict(CompressionMiddleware.compressors, clear=True):
+            self.assertIsNone(middleware.get_encoding(request))
+
+    @override_settings(ITEM_CHANGES_STREAM=True)
+    def test_event_stream_not_compressed(self):
+        with mock.patch.object(ItemViewSet, "changes_stream_timeout", 0):
+            response = self.client.get(
+                reverse("items-changes-stream"),
+                HTTP_ACCEPT="text/event-stream",
+                HTTP_ACCEPT_ENCODING="gzip",
+            )
+            body = b"".join(response.streaming_content).decode()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertTrue(body.startswith("retry:"))
+
+
+class BinaryFormatTestCase(CachedAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.export_url = reverse("items-export")
+
+    def test_export_columns(self):
+        item = Item.objects.order_by("SKU").first()
+        response = self.client.get(self.export_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(response.data), ItemSerializer.Meta.fields)
+        self.assertEqual(len(response.data["SKU"]), Item.objects.count())
+        self.assertEqual(response.data["SKU"][0], item.SKU)
+        self.assertEqual(response.data["in_stock"][0], int(item.in_stock))
+        self.assertEqual(
+            sorted(response.data["tags"][0]),
+            sorted(item.tags.values_list("name", flat=True)),
+        )
+
+    def test_export_in_chunks(self):
+        expected = self.client.get(self.export_url).data
+        with mock.patch.object(ItemViewSet, "export_chunk_size", 7):
+            response = self.client.get(self.export_url)
+        self.assertEqual(response.data, expected)
+
+    def test_export_filtered_fields(self):
+        response = self.client.get(
+            self.export_url, {"stock_status": "IN", "fields": "SKU,tags"}
+        )
+        self.assertEqual(list(response.data), ["SKU", "tags"])
+        self.assertEqual(
+            len(response.data["SKU"]), Item.objects.filter(stock_status="IN").count()
+        )
+
+    @skipUnless(MSGPACK_AVAILABLE, "msgpack is not installed")
+    def test_list_msgpack(self):
+        import msgpack
+
+        response = self.client.get(self.list_url, HTTP_ACCEPT="application/msgpack")
+        self.assertEqual(response["Content-Type"], "application/msgpack")
+        data = msgpack.unpackb(response.content)
+        self.assertEqual(data["count"], Item.objects.count())
+
+    @skipUnless(PYARROW_AVAILABLE, "pyarrow is not installed")
+    def test_export_arrow(self):
+        import pyarrow.ipc
+
+        with mock.patch.object(ItemViewSet, "export_chunk_size", 7):
+            response = self.client.get(self.export_url, {"format": "arrow"})
+            content = b"".join(response.streaming_content)
+        self.assertEqual(response["Content-Type"], "application/vnd.apache.arrow.stream")
+        reader = pyarrow.ipc.open_stream(content)
+        batches = list(reader)
+        self.assertEqual(reader.schema.names, ItemSerializer.Meta.fields)
+        self.assertEqual(len(batches), -(-Item.objects.count() // 7))
+        table = pyarrow.Table.from_batches(batches)
+        self.assertEqual(table.num_rows, Item.objects.count())
+        self.assertEqual(
+            table.column("SKU").to_pylist(),
+            list(Item.objects.order_by("SKU").values_list("SKU", flat=True)),
+        )
+
+    @skipUnless(PYARROW_AVAILABLE, "pyarrow is not installed")
+    def test_export_arrow_empty(self):
+        import pyarrow.ipc
+
+        response = self.client.get(
+            self.export_url, {"format": "arrow", "SKU": "MISSING", "fields": "SKU,tags"}
+        )
+        table = pyarrow.ipc.open_stream(b"".join(response.streaming_content)).read_all()
+        self.assertEqual(table.column_names, ["SKU", "tags"])
+        self.assertEqual(table.num_rows, 0)
+
+
+class SchemaViewTestCase(APITestCase):
+
+    def setUp(self):
+        self.url = reverse("schema-json", kwargs={"format": ".json"})
+        schema.get_schema_document.cache_clear()
+
+    def tearDown(self):
+        schema.get_schema_document.cache_clear()
+
+    def test_schema_is_served(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("/items/", response.json()["paths"])
+        self.assertTrue(response.has_header("ETag"))
+
+    def test_schema_is_generated_once(self):
+        with mock.patch.object(
+            schema, "generate_schema_document", wraps=schema.generate_schema_document
+        ) as generate:
+            self.client.get(self.url)
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH="*")
+
+        generate.assert_called_once()
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_schema_artifact(self):
+        with tempfile.TemporaryDirectory() as schema_dir:
+            with self.settings(OPENAPI_SCHEMA_DIR=schema_dir):
+                call_command("generate_openapi_schema", stdout=io.StringIO())
+                with mock.patch.object(schema, "generate_schema_document") as generate:
+                    response = self.client.get(self.url)
+
+        generate.assert_not_called()
+        self.assertIn("/items/", response.json()["paths"])
+
+    def test_outdated_schema_artifact_is_ignored(self):
+        with tempfile.TemporaryDirectory() as schema_dir:
+            with self.settings(OPENAPI_SCHEMA_DIR=schema_dir):
+                call_command("generate_openapi_schema", stdout=io.StringIO())
+                schema.get_schema_path(".json").write_bytes(b"{}")
+                self.assertEqual(schema.read_schema_document(".json"), b"{}")
+
+                with mock.patch.object(
+                    schema, "get_code_version", return_value="changed"
+                ):
+                    response = self.client.get(self.url)
+
+        self.assertIn("/items/", response.json()["paths"])
+
+
+class BenchmarkCommandTestCase(CachedAPITestCase):
+
+    def test_benchmark_items_endpoint(self):
+        out = io.StringIO()
+        with mock.patch.object(connection, "close") as close:
+            call_command("benchmark_items_endpoint", "testuser", requests=2, stdout=out)
+        # After each of the 4 "new connection" requests, before each mode and
+        # at the end.
+        self.assertEqual(close.call_count, 4 + 2 + 1)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[0].startswith("retrieve  new connection"))
+        # Every list request is computed, not served from the cache.
+        self.assertEqual(list_cache.get_stats()["misses"], 4)
+
+
+class ConnectionSettingsTestCase(APITestCase):
+
+    def test_database_connections_persist(self):
+        settings_dict = connections["default"].settings_dict
+        self.assertEqual(settings_dict["CONN_MAX_AGE"], settings.DB_CONN_MAX_AGE)
+        self.assertEqual(
+            settings_dict["CONN_HEALTH_CHECKS"], settings.DB_CONN_HEALTH_CHECKS
+        )
+
+    def test_settings_read_from_environment(self):
+        environ = {
+            "DB_CONN_MAX_AGE": "60",
+            "DB_CONN_HEALTH_CHECKS": "False",
+            "REDIS_MAX_CONNECTIONS": "7",
+            "REDIS_HEALTH_CHECK_INTERVAL": "3",
+        }
+        with mock.patch.dict(os.environ, environ):
+            module = importlib.reload(settings_module)
+        self.addCleanup(importlib.reload, settings_module)
+
+        self.assertEqual(module.DATABASES["default"]["CONN_MAX_AGE"], 60)
+        self.assertFalse(module.DATABASES["default"]["CONN_HEALTH_CHECKS"])
+        pool_kwargs = module.CACHES["default"]["OPTIONS"]["CONNECTION_POOL_KWARGS"]
+        self.assertEqual(pool_kwargs["max_connections"], 7)
+        self.assertEqual(pool_kwargs["health_check_interval"], 3)
+
+    def test_pool_unsupported(self):
+        self.addCleanup(importlib.reload, settings_module)
+        with mock.patch.dict(os.environ, {"DB_POOL": "True"}), mock.patch(
+            "django.VERSION", (5, 0, 2, "final", 0)
+        ), self.assertRaises(ImproperlyConfigured):
+            importlib.reload(settings_module)
+
+    def test_redis_pool_options(self):
+        pool = get_redis_connection("default").connection_pool
+        pool_kwargs = settings.CACHES["default"]["OPTIONS"]["CONNECTION_POOL_KWARGS"]
+        self.assertEqual(pool.max_connections, pool_kwargs["max_connections"])
+        self.assertEqual(
+            pool.connection_kwargs["health_check_interval"],
+            pool_kwargs["health_check_interval"],
+        )
+        self.assertTrue(pool.connection_kwargs["retry_on_timeout"])
+
+
+@override_settings(DATABASE_REPLICAS=["replica_1"])
+class ReplicaRoutingTestCase(CachedAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.item = Item.objects.order_by("SKU").first()
+        self.detail_url = reverse("items-detail", kwargs={"SKU": self.item.SKU})
+
+    def record_routing(self):
+        """
+        Record whether each read is routed to a replica, keeping it on the
+        test database.
+        """
+        routed = []
+
+        def db_for_read(router, model, **hints):
+            routed.append(db_router.read_from_replicas.get())
+            return "default"
+
+        patcher = mock.patch.object(
+            db_router.ReplicaRouter, "db_for_read", autospec=True, side_effect=db_for_read
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return routed
+
+    def test_router(self):
+        router = db_router.ReplicaRouter()
+        self.assertEqual(router.db_for_read(Item), "default")
+        with db_router.use_replicas():
+            self.assertEqual(router.db_for_read(Item), "replica_1")
+            self.assertEqual(router.db_for_write(Item), "default")
+        self.assertEqual(router.db_for_read(Item), "default")
+        self.assertFalse(router.allow_migrate("replica_1", "items_management"))
+        self.assertTrue(router.allow_migrate("default", "items_management"))
+
+    def test_reads_go_to_replicas(self):
+        routed = self.record_routing()
+        response = self.client.get(self.detail_url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(routed)
+        self.assertTrue(all(routed))
+        self.assertFalse(db_router.read_from_replicas.get())
+
+    def test_writer_is_pinned_to_primary(self):
+        self.client.patch(self.detail_url, {"name": "Renamed Item"}, format="json")
+        self.assertTrue(db_router.is_pinned(self.user))
+
+        routed = self.record_routing()
+        response = self.client.get(self.detail_url)
+
+        self.assertEqual(response.data["name"], "Renamed Item")
+        self.assertTrue(routed)
+        self.assertFalse(any(routed))
+
+    def test_other_clients_are_not_pinned(self):
+        other = User.objects.create_user(username="other", password="testpassword")
+        self.client.patch(self.detail_url, {"name": "Renamed Item"}, format="json")
+
+        self.assertFalse(db_router.is_pinned(other))
+        self.assertTrue(db_router.is_pinned())
+
+    def test_not_pinned_without_replicas(self):
+        cache.set(db_router.GLOBAL_PIN_KEY, 1)
+        cache.set(db_router.get_pin_key(self.user), 1)
+        with override_settings(DATABASE_REPLICAS=[]):
+            self.assertFalse(db_router.is_pinned())
+            self.assertFalse(db_router.is_pinned(self.user))
+
+    def test_pinned_before_list_cache_is_cleared(self):
+        pinned_on_clear = []
+        with mock.patch.object(
+            list_cache,
+            "clear",
+            side_effect=lambda: pinned_on_clear.append(db_router.is_pinned()),
+        ):
+            self.client.patch(self.detail_url, {"name": "Renamed Item"}, format="json")
+        self.assertEqual(pinned_on_clear, [True])
+
+    def test_writer_is_not_served_stale_list(self):
+        self.record_routing()
+        list_url = reverse("items-list")
+        self.client.get(list_url, {"ordering": "SKU"})
+        self.client.patch(self.detail_url, {"name": "Renamed Item"}, format="json")
+
+        # Another request holds the recomputation lock.
+        cache_key = list_cache.get_cache_key(f"{list_url}?ordering=SKU")
+        cache.add(list_cache.LOCK_PREFIX + cache_key, 1)
+        with mock.patch.object(list_cache, "WAIT_TIMEOUT", 0):
+            response = self.client.get(list_url, {"ordering": "SKU"})
+
+        self.assertEqual(response.data["results"][0]["name"], "Renamed Item")
+
+    def test_routing_restored_after_error(self):
+        self.record_routing()
+        with mock.patch.object(
+            ItemViewSet, "retrieve", side_effect=RuntimeError
+        ), self.assertRaises(RuntimeError):
+            self.client.get(self.detail_url)
+        self.assertFalse(db_router.read_from_replicas.get())
@@ -1,18 +1,32 @@
-from django.core.cache import cache
+import itertools
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import BigIntegerField
+from django.db.models.functions import Cast
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import permissions, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.filters import OrderingFilter
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework.response import Response
 
-from inventory_dashboard.settings import StandardResultsSetPagination
+from inventory_dashboard import db_router
+from inventory_dashboard.pagination import StandardResultsSetPagination
 
+from . import change_log, list_cache, warming
 from .filters import ItemFilter
-from .models import Item
-from .serializers import ItemSerializer
+from .models import Item, ItemChange
+from .renderers import ArrowRenderer, BINARY_RENDERER_CLASSES, EventStreamRenderer
+from .serializers import ItemChangeSerializer, ItemSerializer
 
 
 parameter_description = [
@@ -42,6 +56,45 @@ parameter_description = [
     ),
 ]
 
+fields_parameter_description = [
+    openapi.Parameter(
+        name="fields",
+        in_=openapi.IN_QUERY,
+        description=(
+            "Comma separated list of fields to include in each item, "
+            "e.g. 'SKU,name,in_stock'."
+        ),
+        type=openapi.TYPE_STRING,
+    ),
+    openapi.Parameter(
+        name="exclude",
+        in_=openapi.IN_QUERY,
+        description=(
+            "Comma separated list of fields to leave out of each item, "
+            "e.g. 'category,tags'."
+        ),
+        type=openapi.TYPE_STRING,
+    ),
+]
+
+changes_parameter_description = [
+    openapi.Parameter(
+        name="since",
+        in_=openapi.IN_QUERY,
+        description=(
+            "Cursor returned as 'next_cursor' by the previous call. "
+            "Only changes recorded after it are returned."
+        ),
+        type=openapi.TYPE_INTEGER,
+    ),
+    openapi.Parameter(
+        name="limit",
+        in_=openapi.IN_QUERY,
+        description="Maximum number of changes to return.",
+        type=openapi.TYPE_INTEGER,
+    ),
+]
+
 
 class ItemViewSet(viewsets.ModelViewSet):
     """
@@ -73,9 +126,55 @@ class ItemViewSet(viewsets.ModelViewSet):
     pagination_class = StandardResultsSetPagination
     authentication_classes = [JWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, *BINARY_RENDERER_CLASSES]
 
     lookup_field = "SKU"  # Use SKU as the lookup field instead of id
 
+    # Actions reading from the replicas, unless the client recently wrote
+    replica_actions = ("list", "retrieve", "export", "changes")
+
+    # Items read per query while exporting, see get_export_batches
+    export_chunk_size = 2000
+    # Value types of the exported fields, used for the Arrow schema
+    export_field_types = {
+        "SKU": str,
+        "name": str,
+        "category": str,
+        "tags": list,
+        "stock_status": str,
+        "in_stock": int,
+        "available_stock": int,
+    }
+
+    changes_page_size = 100
+    changes_max_page_size = 1000
+    changes_poll_interval = 1  # seconds between change log polls while streaming
+    changes_stream_timeout = 30  # seconds before the client has to reconnect
+
+    def initial(self, request, *args, **kwargs):
+        """
+        Route the queries of read actions to the replicas, unless the user
+        recently wrote.
+        """
+        super().initial(request, *args, **kwargs)
+        self.pinned = False
+        if self.action in self.replica_actions:
+            self.pinned = db_router.is_pinned(request.user)
+            if not self.pinned:
+                self.replica_token = db_router.read_from_replicas.set(True)
+
+    def dispatch(self, request, *args, **kwargs):
+        """
+        Restore the routing changed by initial(), even if the view raises.
+        """
+        self.replica_token = None
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            if self.replica_token is not None:
+                db_router.read_from_replicas.reset(self.replica_token)
+                self.replica_token = None
+
     def get_object(self):
         """
         Retrieve a specific item by SKU.
@@ -84,18 +183,83 @@ class ItemViewSet(viewsets.ModelViewSet):
             Item: The item object.
         """
         sku = self.kwargs.get("SKU")
-        return get_object_or_404(Item, SKU=sku)
+        return get_object_or_404(self.get_queryset(), SKU=sku)
 
     def get_queryset(self):
         """
         Get the queryset for items.
 
+        Only the columns and relations of the requested fields are loaded.
+
         Returns:
             QuerySet: The queryset for items.
         """
-        return Item.objects.order_by("SKU")
+        queryset = Item.objects.order_by("SKU")
+        fields = self.get_requested_fields()
+        if fields is None:
+            return queryset.select_related("category").prefetch_related("tags")
+
+        columns = [field for field in fields if field not in ("category", "tags")]
+        if "category" in fields:
+            queryset = queryset.select_related("category")
+            columns += ["category", "category__name"]
+        if "tags" in fields:
+            queryset = queryset.prefetch_related("tags")
+        return queryset.only(*columns)
+
+    def get_requested_fields(self):
+        """
+        Get the item fields requested with the `fields` and `exclude` parameters.
+
+        Sparse fieldsets only apply when reading items.
+
+        Returns:
+            list: The requested fields, or None if all fields are returned.
+        """
+        if self.request is None or self.action not in ("list", "retrieve", "export"):
+            return None
+
+        fields = self.request.query_params.get("fields")
+        exclude = self.request.query_params.get("exclude")
+        if not fields and not exclude:
+            return None
+
+        available = ItemSerializer.Meta.fields
+        requested = available
+        if fields:
+            requested = [field.strip() for field in fields.split(",") if field.strip()]
+        excluded = []
+        if exclude:
+            excluded = [field.strip() for field in exclude.split(",") if field.strip()]
 
-    @swagger_auto_schema(manual_parameters=parameter_description)
+        unknown = sorted(set(requested + excluded) - set(available))
+        if unknown:
+            raise ValidationError(
+                {"fields": f"Unknown field(s): {', '.join(unknown)}."}
+            )
+        return [field for field in available if field in requested and field not in excluded]
+
+    def get_serializer(self, *args, **kwargs):
+        """
+        Get the serializer, limited to the requested fields when reading items.
+        """
+        if self.get_serializer_class() is ItemSerializer:
+            kwargs.setdefault("fields", self.get_requested_fields())
+        return super().get_serializer(*args, **kwargs)
+
+    @swagger_auto_schema(manual_parameters=fields_parameter_description)
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Retrieve a single item.
+
+        Returns:
+            Response: The response containing the item.
+        """
+        return super().retrieve(request, *args, **kwargs)
+
+    @swagger_auto_schema(
+        manual_parameters=parameter_description + fields_parameter_description
+    )
     def list(self, request, *args, **kwargs):
         """
         List all items.
@@ -103,16 +267,102 @@ class ItemViewSet(viewsets.ModelViewSet):
         Returns:
             Response: The response containing the list of items.
         """
-        cache_key = f"item_list_{request.get_full_path()}"
-        cache_data = cache.get(cache_key)
-
-        if not cache_data:
-            response = super(ItemViewSet, self).list(request, *args, **kwargs)
-            cache_data = response.data
-            cache.set(cache_key, cache_data, timeout=60 * 15)
-            return response
+        path = list_cache.normalize_path(request.path, request.query_params)
+        cache_data = list_cache.get_or_compute(
+            list_cache.get_cache_key(path),
+            lambda: self.get_list_data(request, *args, **kwargs),
+            url=request.build_absolute_uri(path),
+            # A pinned user must see their own write, not the pre-write copy
+            allow_stale=not self.pinned,
+        )
         return Response(cache_data)
 
+    def get_list_data(self, request, *args, **kwargs):
+        """
+        Compute the list of items without going through the cache.
+
+        The cached list is shared by all clients, so it is computed on the
+        primary while any client is pinned to it.
+
+        Returns:
+            The paginated list data.
+        """
+        if db_router.is_pinned():
+            with db_router.use_replicas(False):
+                return super().list(request, *args, **kwargs).data
+        return super().list(request, *args, **kwargs).data
+
+    @swagger_auto_schema(manual_parameters=fields_parameter_description)
+    @action(detail=False, methods=["get"], pagination_class=None)
+    def export(self, request):
+        """
+        Export all items matching the filters in columnar form.
+
+        Rows are read with values_list() in chunks and transposed into one
+        list per field, without instantiating models or running the
+        serializer. Use the Accept header or `format` parameter to get
+        MessagePack or Arrow IPC instead of JSON. Arrow is streamed one
+        record batch per chunk, the other formats are built column by
+        column.
+
+        Returns:
+            Response: The response containing one list of values per field.
+        """
+        fields = self.get_requested_fields() or ItemSerializer.Meta.fields
+        queryset = self.filter_queryset(Item.objects.order_by("SKU"))
+        # Resolved now, the stream below is read after the routing is reset
+        queryset = queryset.using(queryset.db)
+        batches = self.get_export_batches(queryset, fields)
+
+        if isinstance(request.accepted_renderer, ArrowRenderer):
+            field_types = {field: self.export_field_types[field] for field in fields}
+            return StreamingHttpResponse(
+                request.accepted_renderer.render_batches(batches, field_types),
+                content_type=request.accepted_renderer.media_type,
+            )
+
+        data = {field: [] for field in fields}
+        for batch in batches:
+            for field in fields:
+                data[field].extend(batch[field])
+        return Response(data)
+
+    def get_export_batches(self, queryset, fields):
+        """
+        Read the exported items in chunks of export_chunk_size.
+
+        Args:
+            queryset (QuerySet): The items to export.
+            fields (list): The fields to export.
+
+        Yields:
+            dict: One list of values per field for each chunk of items.
+        """
+        lookups = {
+            "category": "category__name",
+            "in_stock": Cast("in_stock", BigIntegerField()),
+            "available_stock": Cast("available_stock", BigIntegerField()),
+        }
+        columns = [field for field in fields if field != "tags"]
+        rows = queryset.values_list(
+            "id", *(lookups.get(field, field) for field in columns)
+        ).iterator(chunk_size=self.export_chunk_size)
+
+        while chunk := list(itertools.islice(rows, self.export_chunk_size)):
+            values = list(zip(*chunk))
+            batch = dict(zip(columns, values[1:]))
+            if "tags" in fields:
+                tags = {}
+                tag_rows = (
+                    Item.tags.through.objects.using(queryset.db)
+                    .filter(item_id__in=values[0])
+                    .values_list("item_id", "tag__name")
+                )
+                for item_id, tag_name in tag_rows:
+                    tags.setdefault(item_id, []).append(tag_name)
+                batch["tags"] = [tags.get(item_id, []) for item_id in values[0]]
+            yield {field: batch[field] for field in fields}
+
     def perform_create(self, serializer):
         """
         Perform additional actions after creating an item.
@@ -120,7 +370,11 @@ class ItemViewSet(viewsets.ModelViewSet):
         Args:
             serializer (Serializer): The serializer instance.
         """
-        super().perform_create(serializer)
+        with transaction.atomic():
+            super().perform_create(serializer)
+            self.record_change(ItemChange.Action.CREATED, serializer.instance)
+        # Pin first, so that lists recomputed after the clear use the primary
+        db_router.pin_to_primary(self.request.user)
         self.clear_list_cache()
 
     def perform_update(self, serializer):
@@ -130,7 +384,11 @@ class ItemViewSet(viewsets.ModelViewSet):
         Args:
             serializer (Serializer): The serializer instance.
         """
-        super().perform_update(serializer)
+        with transaction.atomic():
+            super().perform_update(serializer)
+            self.record_change(ItemChange.Action.UPDATED, serializer.instance)
+        # Pin first, so that lists recomputed after the clear use the primary
+        db_router.pin_to_primary(self.request.user)
         self.clear_list_cache()
 
     def perform_destroy(self, instance):
@@ -140,12 +398,171 @@ class ItemViewSet(viewsets.ModelViewSet):
         Args:
             instance (Item): The item instance.
         """
-        super().perform_destroy(instance)
+        with transaction.atomic():
+            self.record_change(ItemChange.Action.DELETED, instance)
+            super().perform_destroy(instance)
+        # Pin first, so that lists recomputed after the clear use the primary
+        db_router.pin_to_primary(self.request.user)
         self.clear_list_cache()
 
+    def record_change(self, change_action, instance):
+        """
+        Append an entry to the item change log, see change_log.record.
+
+        Args:
+            change_action (str): The kind of change, see ItemChange.Action.
+            instance (Item): The changed item.
+        """
+        change_log.record(change_action, instance)
+
+    def get_changes_cursor(self, value):
+        """
+        Parse a change log cursor.
+
+        Args:
+            value (str): The raw cursor, may be None.
+
+        Returns:
+            int: The id of the last change already seen by the client.
+        """
+        if value in (None, ""):
+            return 0
+        try:
+            cursor = int(value)
+        except (TypeError, ValueError):
+            raise ValidationError({"since": "A valid integer cursor is required."})
+        if cursor < 0:
+            raise ValidationError({"since": "The cursor must not be negative."})
+        return cursor
+
+    def get_changes_limit(self, request):
+        """
+        Get the number of changes to return from the `limit` parameter.
+
+        Returns:
+            int: The number of changes, capped at changes_max_page_size.
+        """
+        value = request.query_params.get("limit")
+        if value in (None, ""):
+            return self.changes_page_size
+        try:
+            limit = int(value)
+        except (TypeError, ValueError):
+            raise ValidationError({"limit": "A valid integer is required."})
+        if limit < 1:
+            raise ValidationError({"limit": "The limit must be positive."})
+        return min(limit, self.changes_max_page_size)
+
+    @swagger_auto_schema(manual_parameters=changes_parameter_description)
+    @action(
+        detail=False,
+        methods=["get"],
+        serializer_class=ItemChangeSerializer,
+        filter_backends=[],
+        pagination_class=None,
+    )
+    def changes(self, request):
+        """
+        List item changes recorded after the `since` cursor.
+
+        Consumers store `next_cursor` and pass it back as `since` to fetch
+        only the changes they have not seen yet.
+
+        Returns:
+            Response: The response containing the changes and the next cursor.
+        """
+        cursor = self.get_changes_cursor(request.query_params.get("since"))
+        limit = self.get_changes_limit(request)
+
+        changes = list(ItemChange.objects.filter(id__gt=cursor)[: limit + 1])
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+        if changes:
+            cursor = changes[-1].id
+
+        serializer = self.get_serializer(changes, many=True)
+        return Response(
+            {
+                "results": serializer.data,
+                "next_cursor": cursor,
+                "has_more": has_more,
+            }
+        )
+
+    @swagger_auto_schema(manual_parameters=changes_parameter_description[:1])
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="changes/stream",
+        serializer_class=ItemChangeSerializer,
+        filter_backends=[],
+        pagination_class=None,
+        renderer_classes=[EventStreamRenderer],
+    )
+    def changes_stream(self, request):
+        """
+        Stream item changes as Server-Sent Events.
+
+        The stream resumes after the `Last-Event-ID` header or the `since`
+        cursor and ends after changes_stream_timeout seconds, at which
+        point the client reconnects with the id of the last event it got.
+
+        Each open stream occupies a worker while it polls, so the stream is
+        only available with ITEM_CHANGES_STREAM enabled, which requires
+        an async gunicorn worker class (e.g. GUNICORN_WORKER_CLASS=gevent).
+
+        Returns:
+            StreamingHttpResponse: The event stream.
+        """
+        if not settings.ITEM_CHANGES_STREAM:
+            raise NotFound("The change stream is disabled, poll the changes endpoint.")
+
+        cursor = self.get_changes_cursor(
+            request.headers.get("Last-Event-ID", request.query_params.get("since"))
+        )
+        response = StreamingHttpResponse(
+            self.stream_changes(cursor), content_type="text/event-stream"
+        )
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    def stream_changes(self, cursor):
+        """
+        Generate Server-Sent Events for changes recorded after the cursor.
+
+        Args:
+            cursor (int): The id of the last change already seen by the client.
+
+        Yields:
+            bytes: The encoded events.
+        """
+        renderer = JSONRenderer()
+        deadline = time.monotonic() + self.changes_stream_timeout
+        yield f"retry: {self.changes_poll_interval * 1000}\n\n".encode()
+
+        while True:
+            changes = list(
+                ItemChange.objects.filter(id__gt=cursor)[: self.changes_max_page_size]
+            )
+            for change in changes:
+                data = renderer.render(ItemChangeSerializer(change).data).decode()
+                yield f"id: {change.id}\nevent: {change.action}\ndata: {data}\n\n".encode()
+                cursor = change.id
+            if time.monotonic() >= deadline:
+                break
+            if len(changes) == self.changes_max_page_size:
+                continue  # more changes are waiting, skip the poll delay
+            yield b": keep-alive\n\n"
+            time.sleep(self.changes_poll_interval)
+
     def clear_list_cache(self):
         """
         Invalidate cache for the list view.
+
+        The most requested lists are recomputed in the background once the
+        current transaction commits.
         """
-        # Here you might want to be more specific or use a pattern to match cache keys
-        cache.delete_pattern("item_list_*")
+        list_cache.clear()
+        if settings.ITEM_LIST_CACHE_WARMING:
+            transaction.on_commit(warming.schedule)
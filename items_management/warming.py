@@ -0,0 +1,116 @@
+"""
+Background warming of the most requested item lists.
+
+After the list cache is invalidated, the top requested lists are
+recomputed on a single worker thread so that user requests find them
+cached. The same warming can be run on deploy with the
+`warm_item_list_cache` management command.
+"""
+
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.db import connections
+from django.test import RequestFactory
+
+from . import list_cache
+
+logger = logging.getLogger(__name__)
+
+executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="item-list-warming")
+_lock = threading.Lock()
+_scheduled = False
+
+
+def _reset_after_fork():
+    # Worker threads do not survive a fork, so a process forked from a
+    # preloaded master (gunicorn --preload) needs its own executor.
+    global executor, _lock, _scheduled
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="item-list-warming")
+    _lock = threading.Lock()
+    _scheduled = False
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def warm_list(url):
+    """
+    Compute and cache a single item list unless it is already cached.
+
+    Args:
+        url (str): The absolute URL of the list, as recorded by list_cache.
+
+    Returns:
+        bool: True if the list was computed.
+    """
+    from .views import ItemViewSet
+
+    parts = urlsplit(url)
+    django_request = RequestFactory().get(
+        f"{parts.path}?{parts.query}",
+        HTTP_HOST=parts.netloc,
+        secure=parts.scheme == "https",
+    )
+    view = ItemViewSet(
+        action_map={"get": "list"}, args=(), kwargs={}, format_kwarg=None
+    )
+    view.request = view.initialize_request(django_request)
+
+    key = list_cache.get_cache_key(
+        list_cache.normalize_path(parts.path, view.request.query_params)
+    )
+    return list_cache.warm(key, lambda: view.get_list_data(view.request))
+
+
+def warm_popular_lists(limit=None):
+    """
+    Compute and cache the most requested item lists that are not cached.
+
+    Args:
+        limit (int): The number of lists to consider, defaults to
+            settings.ITEM_LIST_CACHE_WARM_TOP_N.
+
+    Returns:
+        int: The number of lists computed.
+    """
+    if limit is None:
+        limit = settings.ITEM_LIST_CACHE_WARM_TOP_N
+
+    warmed = 0
+    for url in list_cache.get_popular_lists(limit):
+        try:
+            warmed += warm_list(url)
+        except Exception:
+            logger.warning("Could not warm item list %s", url, exc_info=True)
+    return warmed
+
+
+def _run():
+    global _scheduled
+    with _lock:
+        _scheduled = False
+    try:
+        warm_popular_lists()
+    except Exception:
+        logger.exception("Item list cache warming failed")
+    finally:
+        connections.close_all()
+
+
+def schedule():
+    """
+    Warm the most requested lists on the background worker.
+
+    Calls made while a warming run is already queued are merged into it.
+    """
+    global _scheduled
+    with _lock:
+        if _scheduled:
+            return
+        _scheduled = True
+    executor.submit(_run)